@@ -1,14 +1,16 @@
 # app.py
 import os
+import uuid
 from dotenv import load_dotenv
 import streamlit as st
-from utils.rag import build_embeddings, query_vector_store
-from utils.skills_analyzer import extract_skills, generate_ats_suggestions
+from utils.index_manager import index_manager
+from utils.analysis_cache import analyze_resume, resume_digest
+from utils.ats_scoring import generate_ats_suggestions, target_role_from_prompt
 from utils.job_scraper import search_jobs_comprehensive, match_jobs_to_skills
 from utils.application_helper import generate_cover_letter, generate_interview_prep
 from models.llm import get_chat_model
+from models.embeddings import warm_up_embedding_model
 from utils.text_modes import format_response
-from pypdf import PdfReader
 from langchain_core.messages import SystemMessage, HumanMessage
 
 # Load keys from Streamlit secrets
@@ -22,12 +24,18 @@ os.environ["SERPER_API_KEY"] = st.secrets["SERPER_API_KEY"]
 st.set_page_config(page_title="CareerTrackAI", layout="wide", initial_sidebar_state="expanded")
 load_dotenv()
 
+# Load the embedding model in the background while the first page renders
+warm_up_embedding_model()
+
 # ---------------- SESSION STATE ---------------- #
 if "messages" not in st.session_state: st.session_state.messages = []
 if "skills_data" not in st.session_state: st.session_state.skills_data = None
 if "resume_content" not in st.session_state: st.session_state.resume_content = None
 if "response_mode" not in st.session_state: st.session_state.response_mode = "Detailed"
 if "job_location" not in st.session_state: st.session_state.job_location = "Remote"
+if "session_id" not in st.session_state: st.session_state.session_id = uuid.uuid4().hex
+if "resume_digest" not in st.session_state: st.session_state.resume_digest = None
+if "index_namespace" not in st.session_state: st.session_state.index_namespace = st.session_state.session_id
 
 # ---------------- STYLES ---------------- #
 st.markdown("""
@@ -111,37 +119,21 @@ with st.sidebar:
         </div>
         """, unsafe_allow_html=True)
 
+    # Resume index builds in the background; chat uses keyword search until it is ready
+    build_job = index_manager.job(st.session_state.index_namespace)
+    if build_job is not None and not build_job.done:
+        st.progress(build_job.percent / 100, text=f"Indexing resume ({build_job.stage or 'queued'})...")
+
 # ---------------- Resume Processing ---------------- #
-if uploaded_files:  # single file upload
-    os.makedirs("knowledge_base", exist_ok=True)
-    
-    # Clear old knowledge base files
-    for f in os.listdir("knowledge_base"):
-        os.remove(os.path.join("knowledge_base", f))
-
-    # Save uploaded resume
-    path = os.path.join("knowledge_base", uploaded_files.name)
-    with open(path, "wb") as fh:
-        fh.write(uploaded_files.read())
-
-    # Extract text
-    text = ""
-    if uploaded_files.name.lower().endswith(".txt"):
-        with open(path, "r", encoding="utf-8") as f:
-            text = f.read()
-    elif uploaded_files.name.lower().endswith(".pdf"):
-        pdf = PdfReader(path)
-        text = "\n".join([p.extract_text() for p in pdf.pages if p.extract_text()])
-
-    # Save to session
-    st.session_state.resume_content = text
-
-    # Extract skills and build embeddings
-    try: 
-        st.session_state.skills_data = extract_skills(text)
-        build_embeddings()
-    except:
-        st.session_state.skills_data = None
+# Reruns keep the same upload; analyses and indexes are cached by resume content
+if uploaded_files:
+    resume_bytes = uploaded_files.getvalue()
+    if st.session_state.resume_digest != resume_digest(resume_bytes):
+        analysis = analyze_resume(resume_bytes, uploaded_files.name)
+        st.session_state.resume_digest = analysis["digest"]
+        st.session_state.index_namespace = analysis["namespace"]
+        st.session_state.resume_content = analysis["text"]
+        st.session_state.skills_data = analysis["skills"]
 
 # ---------------- HEADER ---------------- #
 st.markdown('<div class="compact-header"><h1>CareerTrackAI</h1></div>', unsafe_allow_html=True)
@@ -166,12 +158,25 @@ def process_query(prompt):
         st.warning("⚠️ Upload resume first")
         return
     
+    application_help = None
+    if any(k in prompt.lower() for k in ['cover letter','application','interview','ats','resume','cv']):
+        resume_text = st.session_state.resume_content
+        try:
+            if 'cover letter' in prompt.lower(): application_help = {'type':'cover_letter','content':generate_cover_letter(resume_text,prompt)}
+            elif 'interview' in prompt.lower(): application_help = {'type':'interview','content':generate_interview_prep(resume_text,prompt)}
+            elif 'ats' in prompt.lower() or 'resume' in prompt.lower(): application_help = {'type':'ats','content':generate_ats_suggestions(resume_text, target_role_from_prompt(prompt))}
+        except: pass
+
+    # ATS reports are scored locally; the model only explains the findings
+    ats_request = bool(application_help and application_help['type'] == 'ats')
+
     # Process directly
     rag_context = ""
-    try: 
-        rag_chunks = query_vector_store(prompt, top_k=5)
-        rag_context = "\n\n".join(rag_chunks) if rag_chunks else ""
-    except: pass
+    if not ats_request:
+        try: 
+            rag_chunks = index_manager.query(st.session_state.index_namespace, prompt, top_k=5, diversify=True)
+            rag_context = "\n\n".join(rag_chunks) if rag_chunks else ""
+        except: pass
 
     skills_analysis = st.session_state.skills_data
     job_results = None
@@ -185,15 +190,6 @@ def process_query(prompt):
             else: job_results = jobs
         except: pass
 
-    application_help = None
-    if any(k in prompt.lower() for k in ['cover letter','application','interview','ats','resume','cv']):
-        resume_text = st.session_state.get('resume_content', rag_context)
-        try:
-            if 'cover letter' in prompt.lower(): application_help = {'type':'cover_letter','content':generate_cover_letter(resume_text,prompt)}
-            elif 'interview' in prompt.lower(): application_help = {'type':'interview','content':generate_interview_prep(resume_text,prompt)}
-            elif 'ats' in prompt.lower() or 'resume' in prompt.lower(): application_help = {'type':'ats','content':generate_ats_suggestions(resume_text)}
-        except: pass
-
     context_parts = []
     if rag_context: context_parts.append(f"=== RESUME ===\n{rag_context[:2000]}")
     if skills_analysis: context_parts.append(f"=== SKILLS ===\nTechnical: {', '.join(skills_analysis.get('technical_skills',[])[:20])}\nIndustries: {', '.join(skills_analysis.get('detected_industries',[]))}\nExperience: {skills_analysis.get('total_experience',0)} years")
@@ -202,11 +198,14 @@ def process_query(prompt):
         for job in job_results[:8]:
             jobs_summary.append(f"• **{job.get('title')}** at {job.get('company')} ({job.get('location')}) - {job.get('match_score', 'N/A')}% match - [Apply]({job.get('url', '#')})")
         context_parts.append("=== JOBS ===\n" + "\n".join(jobs_summary))
-    if application_help: context_parts.append(f"=== HELP ===\n{application_help['content'][:1000]}")
+    if application_help and application_help['type'] == 'ats': context_parts.append(f"=== ATS REPORT ===\n{application_help['content']}")
+    elif application_help: context_parts.append(f"=== HELP ===\n{application_help['content'][:1000]}")
     full_context = "\n\n".join(context_parts) or "No context."
 
     # Customize system message based on query type
-    if job_results:
+    if ats_request and application_help:
+        system_message = f"You are a professional career advisor.\n\nContext:\n{full_context}\n\nMode: {st.session_state.response_mode}\n\nIMPORTANT: The ATS REPORT was computed from the resume. Report its score as given and explain its findings in priority order with concrete fixes; do not re-score the resume or invent other issues."
+    elif job_results:
         system_message = f"You are a professional career advisor.\n\nContext:\n{full_context}\n\nMode: {st.session_state.response_mode}\n\nIMPORTANT: When showing job listings, include the provided [Apply](url) links exactly as given."
     else:
         system_message = f"You are a professional career advisor.\n\nContext:\n{full_context}\n\nMode: {st.session_state.response_mode}\n\nIMPORTANT: Do not include any placeholder links or 'Apply' buttons. Provide direct, actionable advice."
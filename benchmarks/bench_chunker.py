@@ -0,0 +1,119 @@
+"""
+Compare split_into_chunks with the token-aware split_into_token_chunks.
+
+    python -m benchmarks.bench_chunker                 # synthetic resumes
+    python -m benchmarks.bench_chunker resume.pdf ...  # plus real files
+    python -m benchmarks.bench_chunker --model         # count with the model tokenizer
+
+Reports time per document, chunk counts and how many tokens the word-based
+chunker produces beyond the model's 256-token window (silently truncated at
+encode time).
+"""
+import argparse
+import json
+import random
+import time
+
+from utils.chunking import split_into_chunks, split_into_token_chunks, token_spans
+from utils.ingest import load_text_from_file
+
+MODEL_MAX_TOKENS = 256
+
+SECTION_WORDS = [
+    "Experience", "Skills", "Education", "Projects", "Certifications", "Summary",
+]
+BODY_WORDS = [
+    "led", "built", "designed", "migrated", "reduced", "improved", "python", "aws",
+    "kubernetes", "CI/CD", "SOX", "compliance", "stakeholders", "revenue", "25%",
+    "pipelines", "analytics", "dashboards", "customers", "team", "delivered", "k8s",
+]
+
+
+def synthetic_resume(num_words, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    words = 0
+    while words < num_words:
+        lines.append(rng.choice(SECTION_WORDS))
+        for _ in range(rng.randint(3, 8)):
+            bullet = " ".join(rng.choice(BODY_WORDS) for _ in range(rng.randint(8, 20)))
+            lines.append(f"- {bullet}.")
+            words += len(bullet.split())
+    return "\n".join(lines)
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def truncated_tokens(parts, tokenizer):
+    """Tokens beyond the model window, summed over chunks"""
+    total = 0
+    for part in parts:
+        total += max(0, len(token_spans(part, tokenizer)) + 2 - MODEL_MAX_TOKENS)
+    return total
+
+
+def run(documents, tokenizer, repeats):
+    results = []
+    for name, text in documents:
+        old_seconds, old_parts = best_of(lambda: split_into_chunks(text), repeats)
+        new_seconds, new_parts = best_of(
+            lambda: split_into_token_chunks(text, max_tokens=MODEL_MAX_TOKENS - 2, tokenizer=tokenizer),
+            repeats,
+        )
+        results.append({
+            "document": name,
+            "chars": len(text),
+            "split_into_chunks": {
+                "seconds": round(old_seconds, 5),
+                "chunks": len(old_parts),
+                "truncated_tokens": truncated_tokens(old_parts, tokenizer),
+            },
+            "split_into_token_chunks": {
+                "seconds": round(new_seconds, 5),
+                "chunks": len(new_parts),
+                "truncated_tokens": truncated_tokens([c.text for c in new_parts], tokenizer),
+            },
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="resumes or PDFs to include")
+    parser.add_argument("--model", action="store_true", help="count tokens with the embedding model tokenizer")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    tokenizer = None
+    if args.model:
+        from models.embeddings import get_embedding_tokenizer
+        tokenizer = get_embedding_tokenizer()
+
+    documents = [(f"synthetic-{n}w", synthetic_resume(n)) for n in (1000, 10000, 100000)]
+    documents += [(path, load_text_from_file(path)) for path in args.files]
+
+    results = run(documents, tokenizer, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"tokenizer: {'model' if tokenizer else 'whitespace'}")
+    for row in results:
+        old, new = row["split_into_chunks"], row["split_into_token_chunks"]
+        print(
+            f"{row['document']:<28} old {old['seconds'] * 1000:8.2f} ms {old['chunks']:5d} chunks "
+            f"{old['truncated_tokens']:7d} truncated | new {new['seconds'] * 1000:8.2f} ms "
+            f"{new['chunks']:5d} chunks {new['truncated_tokens']:7d} truncated"
+        )
+
+
+if __name__ == "__main__":
+    main()
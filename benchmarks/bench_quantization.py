@@ -0,0 +1,128 @@
+"""
+Compare float32, int8 and PQ vector storage for the RAG index.
+
+    python -m benchmarks.bench_quantization                  # 20k synthetic vectors
+    python -m benchmarks.bench_quantization --vectors 50000 --k 5
+    python -m benchmarks.bench_quantization --model          # embed synthetic resume chunks
+
+For every storage type, with and without the exact float32 re-rank, reports
+the serialized index size, recall@k against an exact flat index and the p50
+per-query search latency.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from config.config import settings
+from utils.index_factory import STORAGE_TYPES, create_index, rerank_exact
+
+
+def clustered_vectors(num_vectors, dim, seed=0):
+    """Unit vectors drawn around random centres, like topical text embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, num_vectors // 50), dim)).astype(np.float32)
+    vectors = centres[rng.integers(len(centres), size=num_vectors)]
+    vectors = vectors + 0.5 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def model_vectors(num_vectors):
+    """Embed synthetic resume sentences with the configured embedding model"""
+    from benchmarks.bench_chunker import synthetic_resume
+    from models.embeddings import get_embedding_model
+
+    lines = synthetic_resume(num_vectors * 12).splitlines()[:num_vectors]
+    return np.array(get_embedding_model().encode(lines, batch_size=256), dtype=np.float32)
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def search_latencies(search, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query.reshape(1, -1))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(vectors, queries, k, rerank_factor, index_type):
+    ids = np.arange(len(vectors), dtype=np.int64)
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in STORAGE_TYPES:
+            index = create_index(vectors, index_type, os.path.join(tmp, f"{storage}.faiss"), storage)
+            index.add_with_ids(vectors, ids)
+            size = len(faiss.serialize_index(index))
+
+            def plain(q):
+                return index.search(q, k)
+
+            def reranked(q):
+                _, candidates = index.search(q, k * rerank_factor)
+                return rerank_exact(q, candidates, lambda rows: vectors[rows], k)
+
+            modes = [("none", plain)]
+            if storage != "float32":
+                modes.append((f"exact x{rerank_factor}", reranked))
+
+            for rerank, search in modes:
+                _, found = search(queries)
+                latencies = search_latencies(search, queries)
+                results.append({
+                    "storage": storage,
+                    "rerank": rerank,
+                    "index_bytes": size,
+                    "bytes_per_vector": round(size / len(vectors), 1),
+                    f"recall@{k}": round(recall_at_k(found, truth), 4),
+                    "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rerank-factor", type=int, default=settings.RAG_RERANK_FACTOR)
+    parser.add_argument("--index-type", choices=["flat", "ivf", "hnsw"], default="flat")
+    parser.add_argument("--model", action="store_true", help="embed synthetic text with the embedding model")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if args.model:
+        data = model_vectors(args.vectors + args.queries)
+    else:
+        data = clustered_vectors(args.vectors + args.queries, args.dim)
+    vectors, queries = data[:args.vectors], data[args.vectors:]
+
+    results = run(vectors, queries, args.k, max(1, args.rerank_factor), args.index_type)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{len(vectors)} x {vectors.shape[1]}d vectors, {len(queries)} queries, {args.index_type} index")
+    for row in results:
+        print(
+            f"{row['storage']:<8} rerank {row['rerank']:<9} {row['index_bytes'] / 2**20:8.2f} MiB "
+            f"{row['bytes_per_vector']:7.1f} B/vec  recall@{args.k} {row[f'recall@{args.k}']:.3f}  "
+            f"p50 {row['p50_ms']:.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
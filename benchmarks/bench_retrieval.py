@@ -0,0 +1,295 @@
+"""
+End-to-end retrieval benchmark for utils.rag.
+
+    python -m benchmarks.bench_retrieval                      # 1, 100 and 10k synthetic resumes
+    python -m benchmarks.bench_retrieval --docs 100,1000 --k 10
+    python -m benchmarks.bench_retrieval --output bench.json  # save machine-readable results
+    python -m benchmarks.bench_retrieval --baseline bench.json
+
+For every corpus size, builds a fresh VectorStore from synthetic resumes and
+reports chunking and ingest throughput, full and no-op build time, p50/p95
+query_vector_store latency, recall@k of the index against exact search
+over the same vectors, and peak RSS. Each size runs in its own process so
+peak RSS is not inherited from a larger run. With --baseline, results are
+compared against a saved run and the exit status is 1 on a regression, or
+2 if the baseline was run with different settings or corpus sizes.
+
+Set RAG_EMBEDDING_BACKEND=hashing to benchmark the pipeline without the
+embedding model.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.bench_chunker import synthetic_resume
+from config.config import settings
+from models.embeddings import get_embedding_model, get_embedding_model_id
+from utils.chunking import split_into_chunks
+from utils.index_factory import describe_index, describe_storage
+from utils.rag import VectorStore, chunk_text, clear_query_cache, embed_queries
+
+# Higher is worse for these; recall is checked separately. A regression
+# must also exceed the absolute floor, so run-to-run jitter is ignored
+REGRESSION_KEYS = ("build_seconds", "p95_ms", "peak_rss_mb")
+REGRESSION_FLOORS = {"build_seconds": 0.25, "p95_ms": 2.0, "peak_rss_mb": 10}
+# Fewer queries than this give no stable p95 (it is the slowest one or two)
+MIN_LATENCY_QUERIES = 100
+RECALL_DROP = 0.01
+# Runs are only comparable when these settings match
+COMPARABLE_CONFIG = ("embedding_model", "retrieval_mode", "index_type", "vector_storage", "words_per_doc", "k")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def write_corpus(kb_path, num_docs, words, seed=0):
+    """Write num_docs synthetic resumes; returns their texts"""
+    texts = []
+    for doc in range(num_docs):
+        text = synthetic_resume(words, seed=seed + doc)
+        with open(os.path.join(kb_path, f"resume_{doc:06d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        texts.append(text)
+    return texts
+
+
+def sample_queries(texts, num_queries, seed=0):
+    """Short queries cut from random bullet lines of the corpus"""
+    rng = random.Random(seed)
+    lines = [line[2:] for text in texts for line in text.splitlines() if line.startswith("- ")]
+    queries = []
+    for line in rng.sample(lines, min(num_queries, len(lines))):
+        words = line.rstrip(".").split()
+        start = rng.randrange(max(1, len(words) - 6))
+        queries.append(" ".join(words[start:start + rng.randint(3, 6)]))
+    return queries
+
+
+def throughput(fn, texts):
+    """MB of text per second through fn"""
+    size = sum(len(text.encode("utf-8")) for text in texts)
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return round(size / 2**20 / (time.perf_counter() - start), 2)
+
+
+def exact_recall(store, queries, k):
+    """recall@k of the store's dense search against brute force over its own vectors"""
+    snapshot = store.snapshot()
+    ids = np.array(sorted(snapshot.chunks.keys()), dtype=np.int64)
+    k = min(k, len(ids))
+    exact = faiss.IndexFlatL2(snapshot.index.d)
+    exact.add(np.ascontiguousarray(VectorStore._lookup(snapshot)(ids), dtype=np.float32))
+
+    query_vecs = embed_queries(queries)
+    _, truth = exact.search(query_vecs, k)
+    _, found = store._search(snapshot, query_vecs, k)
+    hits = sum(len(set(f[f >= 0]) & set(ids[t])) for f, t in zip(found, truth))
+    return round(hits / truth.size, 4)
+
+
+def run_size(num_docs, words, num_queries, k):
+    """Benchmark one corpus size in this process"""
+    with tempfile.TemporaryDirectory() as tmp:
+        # A fresh embedding cache, so earlier runs cannot serve the vectors
+        settings.RAG_EMBEDDING_CACHE_DIR = os.path.join(tmp, "embedding_cache")
+        store = VectorStore(tmp)
+        os.makedirs(store.kb_path)
+        texts = write_corpus(store.kb_path, num_docs, words)
+        corpus_mb = sum(len(text.encode("utf-8")) for text in texts) / 2**20
+        queries = sample_queries(texts, num_queries)
+
+        # Library progress output goes to stderr so stdout stays parseable
+        with contextlib.redirect_stdout(sys.stderr):
+            get_embedding_model()
+            chunking = {
+                "split_into_chunks_mb_per_s": throughput(split_into_chunks, texts),
+                "chunk_text_mb_per_s": throughput(chunk_text, texts),
+            }
+
+            start = time.perf_counter()
+            if not store.build(force=True):
+                raise RuntimeError(f"build failed for {num_docs} documents")
+            build_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store.build()
+            noop_seconds = time.perf_counter() - start
+
+            clear_query_cache()
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                store.query(query, top_k=k)
+                latencies.append(time.perf_counter() - start)
+
+            recall = exact_recall(store, queries, k)
+            index = store.vector_index
+            num_chunks = len(store.chunks)
+            store.unload()
+
+    return {
+        "docs": num_docs,
+        "chunks": num_chunks,
+        "corpus_mb": round(corpus_mb, 2),
+        "index": f"{describe_index(index)}/{describe_storage(index)}",
+        "chunking": chunking,
+        "build_seconds": round(build_seconds, 3),
+        "noop_build_seconds": round(noop_seconds, 3),
+        "ingest_docs_per_second": round(num_docs / build_seconds, 1),
+        "ingest_chunks_per_second": round(num_chunks / build_seconds, 1),
+        "ingest_mb_per_second": round(corpus_mb / build_seconds, 3),
+        "queries": len(queries),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 3),
+        f"recall@{k}": recall,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(num_docs, args):
+    """Run one size in a child process and return its result row"""
+    command = [
+        sys.executable, "-m", "benchmarks.bench_retrieval", "--single",
+        "--docs", str(num_docs), "--words", str(args.words),
+        "--queries", str(args.queries), "--k", str(args.k),
+    ]
+    output = subprocess.run(command, stdout=subprocess.PIPE, check=True, text=True).stdout
+    return json.loads(output)
+
+
+def config_mismatches(report, baseline):
+    """Settings and corpus sizes that differ between a run and its baseline"""
+    mismatches = [
+        f"{key}: {baseline['config'].get(key)} -> {report['config'].get(key)}"
+        for key in COMPARABLE_CONFIG
+        if baseline.get("config", {}).get(key) != report["config"].get(key)
+    ]
+    sizes = sorted(row["docs"] for row in report["results"])
+    baseline_sizes = sorted(row["docs"] for row in baseline.get("results", []))
+    if sizes != baseline_sizes:
+        mismatches.append(f"docs: {baseline_sizes} -> {sizes}")
+    return mismatches
+
+
+def latency_comparable(row, old):
+    """Whether both runs timed enough queries for their p95 to be compared"""
+    return min(row.get("queries", 0), old.get("queries", 0)) >= MIN_LATENCY_QUERIES
+
+
+def compare(results, baseline, k, tolerance):
+    """
+    Regressions of results against a baseline run, as readable strings.
+    p95 latency is skipped for sizes where either run timed fewer than
+    MIN_LATENCY_QUERIES queries.
+    """
+    previous = {row["docs"]: row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = previous.get(row["docs"])
+        if old is None:
+            continue
+        for key in REGRESSION_KEYS:
+            if key == "p95_ms" and not latency_comparable(row, old):
+                continue
+            if (
+                old.get(key)
+                and row.get(key)
+                and row[key] > old[key] * (1 + tolerance)
+                and row[key] - old[key] > REGRESSION_FLOORS[key]
+            ):
+                regressions.append(f"{row['docs']} docs: {key} {old[key]} -> {row[key]}")
+        recall_key = f"recall@{k}"
+        if recall_key in old and row[recall_key] < old[recall_key] - RECALL_DROP:
+            regressions.append(f"{row['docs']} docs: {recall_key} {old[recall_key]} -> {row[recall_key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", default="1,100,10000", help="comma-separated corpus sizes")
+    parser.add_argument("--words", type=int, default=400, help="words per synthetic resume")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown/growth")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.docs.split(",")]
+    if args.single:
+        print(json.dumps(run_size(sizes[0], args.words, args.queries, args.k)))
+        return
+
+    report = {
+        "config": {
+            "embedding_model": get_embedding_model_id(),
+            "retrieval_mode": settings.RAG_RETRIEVAL_MODE,
+            "index_type": settings.RAG_INDEX_TYPE,
+            "vector_storage": settings.RAG_VECTOR_STORAGE,
+            "words_per_doc": args.words,
+            "k": args.k,
+        },
+        "results": [run_isolated(size, args) for size in sizes],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['config']['embedding_model']}, {settings.RAG_RETRIEVAL_MODE} retrieval, k={args.k}")
+        for row in report["results"]:
+            print(
+                f"{row['docs']:>6} docs {row['chunks']:>7} chunks {row['index']:<14} "
+                f"build {row['build_seconds']:8.2f}s ({row['ingest_docs_per_second']:8.1f} docs/s) "
+                f"noop {row['noop_build_seconds']:6.2f}s  p50 {row['p50_ms']:7.2f} ms  "
+                f"p95 {row['p95_ms']:7.2f} ms  recall@{args.k} {row[f'recall@{args.k}']:.3f}  "
+                f"peak RSS {row['peak_rss_mb']} MB"
+            )
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatches = config_mismatches(report, baseline)
+        if mismatches:
+            for mismatch in mismatches:
+                print(f"❌ Baseline not comparable: {mismatch}", file=sys.stderr)
+            sys.exit(2)
+        previous = {row["docs"]: row for row in baseline["results"]}
+        for row in report["results"]:
+            if not latency_comparable(row, previous[row["docs"]]):
+                print(
+                    f"ℹ️ p95 not compared for {row['docs']} docs: fewer than {MIN_LATENCY_QUERIES} queries timed",
+                    file=sys.stderr,
+                )
+        regressions = compare(report["results"], baseline, args.k, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Compare extract_skills with the per-term regex search it replaced.
+
+    python -m benchmarks.bench_skills                  # synthetic resumes
+    python -m benchmarks.bench_skills resume.pdf ...   # plus real files
+    python -m benchmarks.bench_skills --json
+
+The old implementation ran re.search(r'\b' + re.escape(term) + r'\b')
+once per taxonomy term (and alias) over the whole resume; the new one
+finds every term in one pass with the taxonomy's SkillMatcher. Reports
+per-resume latency of both, the matcher build and cached load times, and
+checks that both return the same result.
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from benchmarks.bench_chunker import BODY_WORDS, SECTION_WORDS, best_of
+from utils.ingest import load_text_from_file
+from utils.skills_analyzer import SkillMatcher, detect_industry, extract_skills, get_taxonomy, load_taxonomy
+
+
+def extract_skills_per_term(resume_text):
+    """extract_skills as it was: one full-text regex search per term"""
+    taxonomy = get_taxonomy()
+    resume_lower = resume_text.lower()
+
+    def found(term):
+        spellings = [term] + [alias for alias, target in taxonomy.aliases.items() if target == term]
+        return any(re.search(r'\b' + re.escape(s) + r'\b', resume_lower) for s in spellings)
+
+    found_skills = {}
+    total_technical_skills = []
+    for category_name, subcategories in taxonomy.categories.items():
+        category_skills = []
+        for skills in subcategories.values():
+            for skill in skills:
+                if found(skill):
+                    category_skills.append(skill.title())
+                    total_technical_skills.append(skill.title())
+        if category_skills:
+            found_skills[category_name] = sorted(set(category_skills))
+
+    found_soft = [s.title() for s in taxonomy.soft_skills if found(s)]
+    found_languages = [l.title() for l in taxonomy.languages if found(l)]
+    found_certs = [c.upper() for certs in taxonomy.certifications.values() for c in certs if found(c)]
+    experience_matches = re.findall(r'(\d+)\+?\s*years?', resume_lower)
+
+    return {
+        'detected_industries': detect_industry(resume_text),
+        'technical_skills': sorted(set(total_technical_skills)),
+        'skills_by_category': found_skills,
+        'soft_skills': sorted(set(found_soft)),
+        'languages': sorted(set(found_languages)),
+        'certifications': sorted(set(found_certs)),
+        'total_experience': max([int(x) for x in experience_matches], default=0),
+        'total_skills': len(total_technical_skills) + len(found_soft),
+    }
+
+
+def taxonomy_terms():
+    taxonomy = get_taxonomy()
+    return list(taxonomy.terms()) + list(taxonomy.aliases)
+
+
+def skill_resume(num_words, seed=0):
+    """Resume-like text mixing filler with taxonomy terms and their near misses"""
+    rng = random.Random(seed)
+    terms = taxonomy_terms()
+    lines = []
+    words = 0
+    while words < num_words:
+        lines.append(rng.choice(SECTION_WORDS))
+        for _ in range(rng.randint(3, 8)):
+            bullet = []
+            for _ in range(rng.randint(8, 20)):
+                roll = rng.random()
+                if roll < 0.15:
+                    bullet.append(rng.choice(terms))
+                elif roll < 0.2:
+                    # Glued to a neighbour, so word boundaries matter
+                    bullet.append(rng.choice(terms) + rng.choice(["s", "ing", "/", "-", "+", "."]))
+                else:
+                    bullet.append(rng.choice(BODY_WORDS))
+            lines.append(f"- {' '.join(bullet)}, {rng.randint(1, 15)} years.")
+            words += len(bullet)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="resumes or PDFs to include")
+    parser.add_argument("--resumes", type=int, default=50, help="synthetic resumes per size")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    SkillMatcher(taxonomy_terms())
+    compile_seconds = time.perf_counter() - start
+    load_taxonomy()
+    start = time.perf_counter()
+    load_taxonomy()
+    load_seconds = time.perf_counter() - start
+
+    corpora = [
+        (f"synthetic-{n}w", [skill_resume(n, seed) for seed in range(args.resumes)])
+        for n in (300, 1000, 5000)
+    ]
+    corpora += [(path, [load_text_from_file(path)]) for path in args.files]
+
+    results = []
+    for name, texts in corpora:
+        mismatches = sum(extract_skills(text) != extract_skills_per_term(text) for text in texts)
+        old_seconds, _ = best_of(lambda: [extract_skills_per_term(text) for text in texts], args.repeats)
+        new_seconds, _ = best_of(lambda: [extract_skills(text) for text in texts], args.repeats)
+        results.append({
+            "corpus": name,
+            "resumes": len(texts),
+            "per_term_ms": round(old_seconds / len(texts) * 1000, 3),
+            "compiled_ms": round(new_seconds / len(texts) * 1000, 3),
+            "speedup": round(old_seconds / new_seconds, 1),
+            "mismatches": mismatches,
+        })
+
+    if args.json:
+        print(json.dumps({
+            "terms": len(set(taxonomy_terms())),
+            "compile_ms": round(compile_seconds * 1000, 2),
+            "cached_load_ms": round(load_seconds * 1000, 2),
+            "results": results,
+        }, indent=2))
+        return
+
+    print(
+        f"{len(set(taxonomy_terms()))} terms, matcher built in {compile_seconds * 1000:.1f} ms, "
+        f"taxonomy loaded from cache in {load_seconds * 1000:.1f} ms"
+    )
+    for row in results:
+        print(
+            f"{row['corpus']:<28} per-term {row['per_term_ms']:8.3f} ms/resume  "
+            f"compiled {row['compiled_ms']:8.3f} ms/resume  {row['speedup']:5.1f}x  "
+            f"{row['mismatches']} mismatches"
+        )
+
+
+if __name__ == "__main__":
+    main()
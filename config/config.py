@@ -9,4 +9,83 @@ class Settings:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     SERP_API_KEY = os.getenv("SERP_API_KEY")  # For live web search
 
+    # Embedding backend (sentence-transformers | quantized | hashing); hashing
+    # needs no model download and is meant for tests and benchmarks
+    RAG_EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "sentence-transformers")
+    RAG_EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    RAG_ONNX_FILE = os.getenv("RAG_ONNX_FILE", "onnx/model_qint8_avx512.onnx")
+    RAG_HASHING_DIM = int(os.getenv("RAG_HASHING_DIM", "384"))
+
+    # Content-addressed embedding cache shared by all indexes (0 MB disables)
+    RAG_EMBEDDING_CACHE_DIR = os.getenv("RAG_EMBEDDING_CACHE_DIR", "embedding_cache")
+    RAG_EMBEDDING_CACHE_MB = int(os.getenv("RAG_EMBEDDING_CACHE_MB", "256"))
+
+    # Vector index selection for RAG (auto | flat | ivf | hnsw)
+    RAG_INDEX_TYPE = os.getenv("RAG_INDEX_TYPE", "auto")
+    RAG_FLAT_MAX_VECTORS = int(os.getenv("RAG_FLAT_MAX_VECTORS", "20000"))
+    RAG_IVF_NPROBE = int(os.getenv("RAG_IVF_NPROBE", "16"))
+    RAG_HNSW_M = int(os.getenv("RAG_HNSW_M", "32"))
+    RAG_HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "80"))
+    RAG_HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+
+    # Vector storage (float32 | int8 | pq); quantized hits are re-ranked exactly
+    # over top_k * RAG_RERANK_FACTOR candidates (1 disables re-ranking)
+    RAG_VECTOR_STORAGE = os.getenv("RAG_VECTOR_STORAGE", "float32")
+    RAG_PQ_M = int(os.getenv("RAG_PQ_M", "48"))
+    RAG_PQ_NBITS = int(os.getenv("RAG_PQ_NBITS", "8"))
+    RAG_RERANK_FACTOR = int(os.getenv("RAG_RERANK_FACTOR", "4"))
+
+    # Retrieval (hybrid | dense | lexical): hybrid fuses BM25 and dense ranks
+    # with RRF and answers short keyword queries from BM25 alone
+    RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+    RAG_HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "50"))
+    RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+    RAG_LEXICAL_MAX_TERMS = int(os.getenv("RAG_LEXICAL_MAX_TERMS", "3"))
+
+    # MMR diversification: candidates fetched and relevance weight (1 = no diversity)
+    RAG_MMR_FETCH_K = int(os.getenv("RAG_MMR_FETCH_K", "20"))
+    RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.5"))
+
+    # Near-duplicate chunks within this many SimHash bits (0-3) share one
+    # embedding; -1 disables deduplication
+    RAG_DEDUP_MAX_DISTANCE = int(os.getenv("RAG_DEDUP_MAX_DISTANCE", "3"))
+
+    # Ingestion pipeline (0 workers = one per CPU core)
+    RAG_INGEST_WORKERS = int(os.getenv("RAG_INGEST_WORKERS", "0"))
+    RAG_INGEST_QUEUE_SIZE = int(os.getenv("RAG_INGEST_QUEUE_SIZE", "4"))
+
+    # Encoding: chunks are sorted by token count in windows of
+    # RAG_ENCODE_SORT_WINDOW; batch size 0 sizes batches by padded tokens
+    # (token budget 0 = derived from CPU cores and free memory). Extra
+    # encode workers help backends that do not already use every core
+    RAG_ENCODE_BATCH_SIZE = int(os.getenv("RAG_ENCODE_BATCH_SIZE", "0"))
+    RAG_ENCODE_TOKEN_BUDGET = int(os.getenv("RAG_ENCODE_TOKEN_BUDGET", "0"))
+    RAG_ENCODE_WORKERS = int(os.getenv("RAG_ENCODE_WORKERS", "1"))
+    RAG_ENCODE_SORT_WINDOW = int(os.getenv("RAG_ENCODE_SORT_WINDOW", "1024"))
+
+    # Chunking, in embedding-model tokens (capped at the model's max length)
+    RAG_CHUNK_TOKENS = int(os.getenv("RAG_CHUNK_TOKENS", "256"))
+    RAG_CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "32"))
+
+    # Skill taxonomy data file; its compiled matcher is cached by content hash
+    SKILL_TAXONOMY_FILE = os.getenv(
+        "SKILL_TAXONOMY_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.json")
+    )
+    SKILL_MATCHER_CACHE_DIR = os.getenv("SKILL_MATCHER_CACHE_DIR", "skill_matcher_cache")
+
+    # Resume analyses (text, skills, index namespace) keyed by sha256 of the
+    # uploaded bytes: how many are kept on disk and in memory
+    ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", "analysis_cache")
+    ANALYSIS_CACHE_ENTRIES = int(os.getenv("ANALYSIS_CACHE_ENTRIES", "256"))
+    ANALYSIS_CACHE_MEMORY_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MEMORY_ENTRIES", "32"))
+
+    # Per-session indexes: where they live and how much RAM loaded ones may use
+    RAG_NAMESPACE_DIR = os.getenv("RAG_NAMESPACE_DIR", "indexes")
+    RAG_INDEX_MEMORY_MB = int(os.getenv("RAG_INDEX_MEMORY_MB", "512"))
+
+    # Background builds: concurrent build threads, and the word-window size of
+    # the raw-text passages searched until a namespace's index is ready
+    RAG_BUILD_WORKERS = int(os.getenv("RAG_BUILD_WORKERS", "2"))
+    RAG_FALLBACK_PASSAGE_WORDS = int(os.getenv("RAG_FALLBACK_PASSAGE_WORDS", "120"))
+
 settings = Settings()
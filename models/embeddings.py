@@ -1,7 +1,208 @@
-from sentence_transformers import SentenceTransformer
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from config.config import settings
 
-def get_embedding_model():
+EMBEDDING_MODEL_NAME = settings.RAG_EMBEDDING_MODEL
+
+# Word tokens for the hashing embedder
+HASH_TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+(?:[./&-][a-z0-9+#]+)*")
+
+# Process-wide registry: one backend instance per (backend, model), shared by every caller
+_models = {}
+_load_times = {}
+_warmup_threads = {}
+_lock = threading.Lock()
+
+
+class SentenceTransformerBackend:
+    """The Sentence-BERT model, run by sentence-transformers on torch"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME):
+        self.model_name = model_name
+        self.model = self._load()
+        self.tokenizer = getattr(self.model, "tokenizer", None)
+        self.max_seq_length = getattr(self.model, "max_seq_length", None)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def _load(self):
+        # Imported here so importing this module does not pull in torch
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name)
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        return np.asarray(
+            self.model.encode(texts, batch_size=batch_size, show_progress_bar=show_progress_bar),
+            dtype=np.float32,
+        )
+
+
+class QuantizedBackend(SentenceTransformerBackend):
+    """
+    The same model on CPU with int8 weights.
+    Runs the quantized ONNX export through onnxruntime when it is installed,
+    otherwise applies torch dynamic int8 quantization to the Linear layers.
+    """
+
+    name = "quantized"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        try:
+            import onnxruntime  # noqa: F401
+
+            return SentenceTransformer(
+                self.model_name,
+                device="cpu",
+                backend="onnx",
+                model_kwargs={"file_name": settings.RAG_ONNX_FILE},
+            )
+        except Exception as e:
+            print(f"⚠️ ONNX backend unavailable ({e}), using torch int8 quantization")
+
+        import torch
+
+        model = SentenceTransformer(self.model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class HashingEmbedder:
     """
-    Load the Sentence-BERT model for embeddings (used in RAG).
+    Zero-dependency feature-hashing embedder.
+
+    Word unigrams and bigrams are hashed into `dimension` signed buckets
+    and the vector is L2-normalized. Deterministic across processes and
+    needs no model download, so the full build/query path runs offline in
+    milliseconds; similarity is purely lexical.
     """
-    return SentenceTransformer("all-MiniLM-L6-v2")
+
+    name = "hashing"
+    tokenizer = None
+    max_seq_length = None
+
+    def __init__(self, model_name=None, dimension=None):
+        self.dimension = dimension or settings.RAG_HASHING_DIM
+        self.model_name = f"hashing-{self.dimension}"
+
+    def encode(self, texts, batch_size=None, show_progress_bar=False):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = HASH_TOKEN_PATTERN.findall(text.lower())
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                h = zlib.crc32(feature.encode("utf-8"))
+                # Low bits pick the bucket, the top bit the sign
+                vectors[row, h % self.dimension] += 1.0 if h >> 31 else -1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        return vectors[0] if single else vectors
+
+
+BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    QuantizedBackend.name: QuantizedBackend,
+    HashingEmbedder.name: HashingEmbedder,
+}
+
+
+def _resolve(model_name=None, backend=None):
+    backend = (backend or settings.RAG_EMBEDDING_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {sorted(BACKENDS)}")
+    return backend, model_name or EMBEDDING_MODEL_NAME
+
+
+def get_embedding_model_id(model_name=None, backend=None):
+    """
+    Identifier of the vectors a backend produces, without loading it.
+    Recorded in index manifests and cache keys, so switching backends
+    rebuilds indexes instead of mixing incompatible vectors.
+    """
+    backend, model_name = _resolve(model_name, backend)
+    if backend == HashingEmbedder.name:
+        return f"hashing-{settings.RAG_HASHING_DIM}"
+    if backend == QuantizedBackend.name:
+        return f"{model_name}@quantized"
+    return model_name
+
+
+def get_embedding_model(model_name=None, backend=None):
+    """
+    Load the embedding backend selected by settings.RAG_EMBEDDING_BACKEND.
+    The backend is loaded lazily on first use and shared across the process;
+    every backend exposes encode(), tokenizer, max_seq_length and dimension.
+    """
+    key = _resolve(model_name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            start = time.perf_counter()
+            model = BACKENDS[key[0]](key[1])
+            _load_times[key] = time.perf_counter() - start
+            _models[key] = model
+            print(f"🧠 Loaded {key[0]} embedding model {model.model_name} in {_load_times[key]:.2f}s")
+
+    return model
+
+
+def get_embedding_tokenizer(model_name=None, backend=None):
+    """Return the model's tokenizer, or None if the model does not expose one"""
+    return getattr(get_embedding_model(model_name, backend), "tokenizer", None)
+
+
+def get_max_seq_length(model_name=None, backend=None):
+    """Tokens the model reads per input, including special tokens, or None"""
+    return getattr(get_embedding_model(model_name, backend), "max_seq_length", None)
+
+
+def warm_up_embedding_model(model_name=None, background=True, backend=None):
+    """
+    Load the embedding model ahead of the first query.
+    With background=True the load runs in a daemon thread and the thread is
+    returned; repeated calls while it is loading reuse the same thread.
+    """
+    key = _resolve(model_name, backend)
+    if key in _models:
+        return None
+
+    if not background:
+        get_embedding_model(key[1], key[0])
+        return None
+
+    with _lock:
+        thread = _warmup_threads.get(key)
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(
+                target=get_embedding_model,
+                args=(key[1], key[0]),
+                name=f"embedding-warmup-{key[0]}-{key[1]}",
+                daemon=True,
+            )
+            _warmup_threads[key] = thread
+            thread.start()
+    return thread
+
+
+def is_embedding_model_loaded(model_name=None, backend=None):
+    """Whether the model has already been loaded in this process"""
+    return _resolve(model_name, backend) in _models
+
+
+def get_model_load_time(model_name=None, backend=None):
+    """Seconds spent loading the model, or None if it has not been loaded"""
+    return _load_times.get(_resolve(model_name, backend))
@@ -0,0 +1,71 @@
+import pytest
+
+from config.config import settings
+from utils.ats_scoring import check_formatting, check_keywords, check_quantified, detect_roles
+from utils.skills_analyzer import extract_skills
+
+
+@pytest.fixture(autouse=True)
+def matcher_cache(tmp_path, monkeypatch):
+    """Keep the compiled matcher cache out of the working tree"""
+    monkeypatch.setattr(settings, "SKILL_MATCHER_CACHE_DIR", str(tmp_path / "skill_matcher_cache"))
+
+
+BACKEND_RESUME = """SUMMARY
+Backend software engineer who worked through ambiguous requirements and built internal tools.
+
+EXPERIENCE
+- Led migration of 30 services to Kubernetes with Terraform
+- Built ETL pipelines in Python processing 2TB/day
+
+EDUCATION
+B.S. Computer Science
+
+SKILLS
+Python, Go, Java, SQL, Docker, Kubernetes, AWS, GCP, Terraform, Linux, PostgreSQL, Redis, Django, Flask
+"""
+
+ANALYST_RESUME = """SUMMARY
+Data analyst turning retail data into decisions.
+
+EXPERIENCE
+- Built Tableau dashboards tracking 25 KPIs
+- Wrote SQL and Python to automate weekly reporting
+
+SKILLS
+SQL, Python, Excel, Tableau, Power BI, statistics
+"""
+
+
+def test_role_keywords_match_whole_words():
+    # "hr" in "through", "ui" in "built", and the EDUCATION heading are not roles
+    assert detect_roles(BACKEND_RESUME) == ["technology"]
+
+
+def test_data_analyst_is_not_finance():
+    assert detect_roles(ANALYST_RESUME)[0] == "data"
+    assert "finance" not in detect_roles("Senior data analyst role")
+
+
+def test_ats_role_skills_stay_out_of_extract_skills():
+    skills = extract_skills("Senior Python developer with SQL and Excel, building Tableau dashboards")
+    assert skills["total_skills"] == 3
+    assert "Tableau" not in skills["technical_skills"]
+
+
+def test_missing_keywords_come_from_the_resumes_field():
+    message = " ".join(finding["message"] for finding in check_keywords(ANALYST_RESUME)["findings"])
+    for unrelated in ("accounts payable", "bookkeeping", "bcg matrix", "javascript"):
+        assert unrelated not in message
+
+
+def test_skills_list_is_not_keyword_stuffing():
+    result = check_keywords(BACKEND_RESUME)
+    assert result["details"]["density"] < 0.15
+    assert not any("stuffing" in finding["message"] for finding in result["findings"])
+
+
+def test_bullet_glyphs_are_not_icons():
+    text = "\n".join(f"● Delivered project {i} for 12 customers" for i in range(5))
+    assert check_quantified(text)["details"]["bullets"] == 5
+    assert not any("Icons" in finding["message"] for finding in check_formatting(text)["findings"])
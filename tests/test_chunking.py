@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from utils.chunking import split_into_token_chunks, token_spans
+
+WORDS = ["internet", "kubernetes", "microservices", "engineering", "observability", "the", "and", "built", "led"]
+
+
+@pytest.fixture(scope="module")
+def wordpiece():
+    """A tiny WordPiece tokenizer, so words split into several pieces"""
+    tokenizers = pytest.importorskip("tokenizers")
+    transformers = pytest.importorskip("transformers")
+    rng = random.Random(0)
+    tokenizer = tokenizers.BertWordPieceTokenizer(lowercase=True)
+    tokenizer.train_from_iterator([" ".join(rng.choices(WORDS, k=50)) for _ in range(50)], vocab_size=60)
+    return transformers.PreTrainedTokenizerFast(tokenizer_object=tokenizer._tokenizer)
+
+
+def test_chunks_slice_the_source_with_overlap():
+    text = " ".join(f"word{i}" for i in range(100))
+    chunks = split_into_token_chunks(text, max_tokens=30, overlap=5)
+    assert all(text[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+    assert all(chunk.num_tokens <= 30 for chunk in chunks)
+    assert chunks[1].text.startswith("word25 ")
+    assert chunks[-1].text.endswith("word99")
+
+
+def test_wordpiece_chunks_keep_their_size_when_re_tokenized(wordpiece):
+    text = " ".join(random.Random(1).choices(WORDS + ["Node.js", "(CI/CD)"], k=2000))
+    for chunk in split_into_token_chunks(text, max_tokens=30, overlap=8, tokenizer=wordpiece):
+        assert len(token_spans(chunk.text, wordpiece)) == chunk.num_tokens <= 30
+        # Windows never start or end inside a word
+        assert chunk.start == 0 or not (text[chunk.start - 1].isalnum() and text[chunk.start].isalnum())
+        assert chunk.end == len(text) or not (text[chunk.end - 1].isalnum() and text[chunk.end].isalnum())
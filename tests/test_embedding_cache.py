@@ -0,0 +1,36 @@
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+
+
+def vectors(*values):
+    return np.array([[value] * 4 for value in values], dtype=np.float32)
+
+
+def test_round_trip_and_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "m", 4, 2)
+    cache.put_many(["a", "b"], vectors(1, 2))
+    cache.get_many(["a"])
+    cache.put_many(["c"], vectors(3))
+
+    found, missing = cache.get_many(["a", "b", "c"])
+    assert missing == [1]
+    assert found[0].tolist() == [1] * 4 and found[2].tolist() == [3] * 4
+
+
+def test_reopened_cache_keeps_entries(tmp_path):
+    EmbeddingCache(str(tmp_path), "m", 4, 8).put_many(["a"], vectors(1))
+    found, missing = EmbeddingCache(str(tmp_path), "m", 4, 8).get_many(["a"])
+    assert missing == [] and found[0].tolist() == [1] * 4
+
+
+def test_caches_sharing_a_directory_do_not_overwrite_each_other(tmp_path):
+    # Two handles on one directory stand in for two processes
+    first = EmbeddingCache(str(tmp_path), "m", 4, 8)
+    second = EmbeddingCache(str(tmp_path), "m", 4, 8)
+    first.put_many(["alpha"], vectors(1))
+    second.put_many(["beta"], vectors(2))
+
+    found, missing = first.get_many(["alpha", "beta"])
+    assert missing == []
+    assert found.tolist() == vectors(1, 2).tolist()
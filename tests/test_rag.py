@@ -0,0 +1,175 @@
+import os
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from config.config import settings
+from utils.index_factory import describe_index, describe_storage
+from utils.index_manager import IndexManager
+from utils.lexical import LexicalIndexBuilder
+from utils.mmr import maximal_marginal_relevance
+from utils.rag import VectorStore
+
+
+@pytest.fixture(autouse=True)
+def hashing_backend(tmp_path, monkeypatch):
+    """Build real indexes with the hashing embedder and small chunks, all under tmp_path"""
+    monkeypatch.setattr(settings, "RAG_EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setattr(settings, "RAG_EMBEDDING_CACHE_DIR", str(tmp_path / "embedding_cache"))
+    monkeypatch.setattr(settings, "RAG_INGEST_WORKERS", 1)
+    monkeypatch.setattr(settings, "RAG_CHUNK_TOKENS", 16)
+    monkeypatch.setattr(settings, "RAG_CHUNK_OVERLAP", 2)
+    monkeypatch.setattr(settings, "RAG_PQ_NBITS", 4)
+
+
+def document(topic, words, seed):
+    """Filler text with the topic word mixed in, distinct per seed"""
+    rng = random.Random(seed)
+    vocabulary = [f"{topic}{i}" for i in range(200)] + [topic] * 20
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def write(store, name, text):
+    with open(os.path.join(store.kb_path, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def sources(hits):
+    return {os.path.basename(hit["metadata"]["source"]) for hit in hits}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VectorStore(str(tmp_path / "store"))
+    os.makedirs(store.kb_path)
+    return store
+
+
+def test_add_and_remove_a_file(store):
+    write(store, "kubernetes.txt", document("kubernetes", 300, 1))
+    assert store.build()
+    first = store.snapshot()
+
+    write(store, "accounting.txt", document("accounting", 300, 2))
+    assert store.build()
+    second = store.snapshot()
+    assert second.version > first.version
+    assert len(second.chunks) > len(first.chunks)
+    assert sources(store.query("accounting ledger", top_k=3, with_metadata=True)) == {"accounting.txt"}
+
+    os.remove(os.path.join(store.kb_path, "accounting.txt"))
+    assert store.build()
+    assert len(store.snapshot().chunks) == len(first.chunks)
+    assert store.query("accounting", top_k=3, filter={"source": "accounting.txt"}) == []
+    assert sources(store.query("accounting", top_k=3, with_metadata=True)) == {"kubernetes.txt"}
+
+
+def test_unchanged_rebuild_reuses_the_generation(store):
+    write(store, "kubernetes.txt", document("kubernetes", 300, 1))
+    store.build()
+    version = store.snapshot().version
+    store.build()
+    assert store.snapshot().version == version
+
+
+@pytest.mark.parametrize(
+    "index_type, storage",
+    [("flat", "float32"), ("flat", "int8"), ("flat", "pq"), ("hnsw", "int8"), ("hnsw", "pq")],
+)
+def test_filtered_search_for_each_storage(store, monkeypatch, index_type, storage):
+    monkeypatch.setattr(settings, "RAG_INDEX_TYPE", index_type)
+    monkeypatch.setattr(settings, "RAG_VECTOR_STORAGE", storage)
+    topics = ["kubernetes", "accounting", "nursing", "marketing"]
+    for seed, topic in enumerate(topics):
+        write(store, f"{topic}.txt", document(topic, 2500, seed))
+    assert store.build()
+    assert describe_index(store.vector_index) == index_type
+    assert describe_storage(store.vector_index) == storage
+
+    hits = store.query("kubernetes deployment", top_k=5, filter={"source": "nursing.txt"}, with_metadata=True)
+    assert len(hits) == 5
+    assert sources(hits) == {"nursing.txt"}
+
+
+def test_duplicate_is_searchable_after_its_original_is_removed(store):
+    text = document("kubernetes", 300, 1)
+    write(store, "original.txt", text)
+    store.build()
+    merged = len(store.snapshot().chunks)
+    write(store, "copy.txt", text)
+    store.build()
+    # The copy's chunks are merged into the original's instead of added
+    assert len(store.snapshot().chunks) == merged
+
+    os.remove(os.path.join(store.kb_path, "original.txt"))
+    store.build()
+    assert len(store.snapshot().chunks) == merged
+    assert store.query("kubernetes", top_k=3, filter={"source": "original.txt"}) == []
+    hits = store.query("kubernetes", top_k=3, filter={"source": "copy.txt"}, with_metadata=True)
+    assert len(hits) == 3 and sources(hits) == {"copy.txt"}
+
+
+def test_diversified_query_returns_distinct_chunks(store):
+    for seed in range(3):
+        write(store, f"doc{seed}.txt", document("kubernetes", 300, seed))
+    store.build()
+    hits = store.query("kubernetes cluster upgrades were planned", top_k=5, diversify=True)
+    assert len(hits) == 5 and len(set(hits)) == 5
+
+
+def test_mmr_prefers_a_different_candidate_over_a_near_copy():
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array([[1.0, 0.0, 0.0], [0.99, 0.01, 0.0], [0.7, 0.7, 0.0]])
+    assert list(maximal_marginal_relevance(query, candidates, 2, 0.3)) == [0, 2]
+
+
+def test_lexical_extend_keeps_only_the_given_chunks():
+    builder = LexicalIndexBuilder()
+    builder.add(0, "kubernetes operator")
+    builder.add(1, "accounting ledger")
+    old = builder.build()
+
+    builder = LexicalIndexBuilder()
+    builder.extend(old, [1])
+    builder.add(2, "kubernetes helm")
+    _, ids = builder.build().search("kubernetes", 5)
+    assert list(ids) == [2]
+
+
+def test_build_async_answers_from_raw_text_then_swaps_to_the_index(tmp_path, monkeypatch):
+    release = threading.Event()
+    build = VectorStore.build
+
+    def held_build(self, *args, **kwargs):
+        release.wait(30)
+        return build(self, *args, **kwargs)
+
+    monkeypatch.setattr(VectorStore, "build", held_build)
+    manager = IndexManager(base_dir=str(tmp_path / "indexes"))
+    text = document("kubernetes", 300, 1)
+    write(manager.get("resume"), "resume.txt", text)
+
+    job = manager.build_async("resume", text=text)
+    hits = manager.query("resume", "kubernetes", top_k=2, with_metadata=True)
+    assert len(hits) == 2 and all(hit["metadata"] is None for hit in hits)
+
+    release.set()
+    job.wait(30)
+    assert job.ready
+    hits = manager.query("resume", "kubernetes", top_k=2, with_metadata=True)
+    assert len(hits) == 2 and sources(hits) == {"resume.txt"}
+    assert manager.stats()["building"] == 0
+
+
+def test_least_recently_used_index_is_evicted_and_reloaded(tmp_path):
+    manager = IndexManager(base_dir=str(tmp_path / "indexes"), max_memory_bytes=1)
+    for namespace in ("first", "second"):
+        write(manager.get(namespace), f"{namespace}.txt", document(namespace, 300, 1))
+        manager.build(namespace)
+
+    assert not manager.get("first").is_loaded()
+    assert manager.evictions == 1
+    assert sources(manager.query("first", "first", top_k=2, with_metadata=True)) == {"first.txt"}
+    assert manager.get("first").is_loaded()
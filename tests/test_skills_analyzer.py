@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from config.config import settings
+from utils import skills_analyzer
+from utils.skills_analyzer import SkillTaxonomy, detect_industry, extract_skills, load_taxonomy
+
+
+@pytest.fixture(autouse=True)
+def matcher_cache(tmp_path, monkeypatch):
+    """Keep the compiled matcher cache out of the working tree"""
+    monkeypatch.setattr(settings, "SKILL_MATCHER_CACHE_DIR", str(tmp_path / "skill_matcher_cache"))
+
+
+@pytest.fixture
+def taxonomy():
+    return load_taxonomy()
+
+
+@pytest.mark.parametrize(
+    "text, skill",
+    [
+        ("Built REST services with Node.js and Express", "javascript"),
+        ("Administered 5 ml doses per patient protocol", "machine learning"),
+        ("Active TS/SCI clearance", "typescript"),
+        ("Ran Spark jobs on Amazon EMR", "ehr"),
+    ],
+)
+def test_short_words_do_not_match_aliases(taxonomy, text, skill):
+    assert skill not in taxonomy.find(text.lower())
+
+
+@pytest.mark.parametrize(
+    "text, skill",
+    [
+        ("Deployed services to k8s", "kubernetes"),
+        ("Backend in Golang and Postgres", "go"),
+        ("Backend in Golang and Postgres", "postgresql"),
+        ("Wrote JavaScript and TypeScript", "javascript"),
+        ("Wrote JavaScript and TypeScript", "typescript"),
+    ],
+)
+def test_aliases_and_terms_match(taxonomy, text, skill):
+    assert skill in taxonomy.find(text.lower())
+
+
+def test_extract_skills_reports_no_alias_false_positives():
+    skills = extract_skills("Node.js developer, TS/SCI cleared, 5 ml pipette work")
+    assert "Javascript" not in skills["technical_skills"]
+    assert "Typescript" not in skills["technical_skills"]
+    assert "Machine Learning" not in skills["technical_skills"]
+
+
+def test_industry_keywords_match_whole_words():
+    # "hr" inside "through" and "ui" inside "built" are not industries
+    assert detect_industry("Software developer who built tools through ambiguity") == ["technology"]
+    assert detect_industry("Registered nurses and doctors") == ["healthcare"]
+
+
+def test_bare_short_alias_is_rejected():
+    with open(settings.SKILL_TAXONOMY_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["aliases"]["js"] = "javascript"
+    with pytest.raises(ValueError, match="too short"):
+        SkillTaxonomy(data, digest="test")
+
+
+def test_short_alias_with_a_digit_is_allowed():
+    assert len("k8s") < skills_analyzer.MIN_ALIAS_LENGTH
+    with open(settings.SKILL_TAXONOMY_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert SkillTaxonomy(data, digest="test").aliases["k8s"] == "kubernetes"
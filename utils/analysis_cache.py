@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from config.config import settings
+from utils.atomic_io import atomic_write_json
+from utils.index_manager import index_manager
+from utils.ingest import load_text_from_file
+from utils.skills_analyzer import extract_skills, get_taxonomy
+
+# Bump when the layout of a cached analysis changes, so old entries are ignored
+ANALYSIS_FORMAT = 1
+
+
+def resume_digest(data: bytes) -> str:
+    """sha256 of a resume's raw bytes, as hex"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def resume_namespace(digest):
+    """Index namespace of a resume; identical uploads share one index"""
+    return f"resume-{digest[:32]}"
+
+
+class AnalysisCache:
+    """
+    Resume analyses keyed by the sha256 of the uploaded bytes.
+
+    Each entry is a JSON file under directory, so analyses survive restarts
+    and are shared by every session that uploads the same resume. The most
+    recently used entries are also kept in memory. Reading an entry bumps
+    its file's mtime; past max_entries files the least recently used are
+    deleted, and on_evict, if given, is called with each deleted digest.
+    """
+
+    def __init__(self, directory=None, max_entries=None, memory_entries=None, on_evict=None):
+        self.directory = directory or settings.ANALYSIS_CACHE_DIR
+        self.max_entries = settings.ANALYSIS_CACHE_ENTRIES if max_entries is None else max_entries
+        self.memory_entries = settings.ANALYSIS_CACHE_MEMORY_ENTRIES if memory_entries is None else memory_entries
+        self.on_evict = on_evict
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _remember(self, digest, entry):
+        self._memory[digest] = entry
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, digest):
+        """The cached analysis for digest, or None"""
+        with self._lock:
+            entry = self._memory.get(digest)
+            if entry is None:
+                try:
+                    with open(self._path(digest), "r", encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    entry = None
+                if entry is not None and entry.get("format") != ANALYSIS_FORMAT:
+                    entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["hits"] += 1
+            self._remember(digest, entry)
+            try:
+                os.utime(self._path(digest))
+            except OSError:
+                pass
+            return entry
+
+    def put(self, digest, entry):
+        """Store an analysis in memory and on disk, evicting old entries"""
+        entry = dict(entry, format=ANALYSIS_FORMAT)
+        with self._lock:
+            self._remember(digest, entry)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                atomic_write_json(self._path(digest), entry)
+                self._prune()
+            except OSError as e:
+                print(f"⚠️ Could not persist resume analysis: {e}")
+        return entry
+
+    def _prune(self):
+        cached = sorted(
+            (item for item in os.scandir(self.directory) if item.name.endswith(".json")),
+            key=lambda item: item.stat().st_mtime,
+            reverse=True,
+        )
+        for item in cached[self.max_entries:]:
+            digest = item.name[:-len(".json")]
+            os.remove(item.path)
+            self._memory.pop(digest, None)
+            self._stats["evictions"] += 1
+            if self.on_evict is not None:
+                self.on_evict(digest)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, memory_entries=len(self._memory))
+
+
+def _drop_index(digest):
+    """Delete an evicted resume's index, job and raw-text fallback"""
+    index_manager.drop(resume_namespace(digest))
+
+
+analysis_cache = AnalysisCache(on_evict=_drop_index)
+
+
+def _save_resume(namespace, filename, data):
+    """Make the resume the only file in the namespace's knowledge base"""
+    kb_path = index_manager.get(namespace).kb_path
+    path = os.path.join(kb_path, filename)
+    for name in os.listdir(kb_path):
+        if name != filename:
+            os.remove(os.path.join(kb_path, name))
+    if not os.path.exists(path):
+        with open(path, "wb") as fh:
+            fh.write(data)
+    return path
+
+
+def analyze_resume(data: bytes, filename: str) -> dict:
+    """
+    Text, skills and index namespace of an uploaded resume, computed only
+    when not already cached for these exact bytes. Skills are re-extracted
+    when the skill taxonomy changed since they were cached, and the index
+    build is started unless it is already under way or done.
+    """
+    digest = resume_digest(data)
+    namespace = resume_namespace(digest)
+    entry = analysis_cache.get(digest)
+
+    if entry is None:
+        filename = os.path.basename(filename)
+        entry = {
+            "digest": digest,
+            "filename": filename,
+            "namespace": namespace,
+            "text": load_text_from_file(_save_resume(namespace, filename, data)),
+            "skills": None,
+            "taxonomy": None,
+        }
+    else:
+        # The index directory may have been cleared since the entry was cached
+        _save_resume(namespace, entry["filename"], data)
+
+    taxonomy = get_taxonomy()
+    if entry["taxonomy"] != taxonomy.digest:
+        try:
+            skills = extract_skills(entry["text"])
+        except Exception as e:
+            print(f"⚠️ Skill extraction failed: {e}")
+            skills = None
+        entry = analysis_cache.put(digest, dict(entry, skills=skills, taxonomy=taxonomy.digest))
+
+    index_manager.ensure_built(namespace, text=entry["text"])
+    return entry
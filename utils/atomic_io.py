@@ -0,0 +1,32 @@
+import os
+import json
+
+
+def fsync_file(path):
+    """Flush a written file's data to disk"""
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def fsync_dir(path):
+    """Flush a directory entry (new or renamed files) to disk where supported"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Windows cannot open directories; renames there are already durable
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path, data):
+    """Write JSON to a temp file, fsync it and rename it over path"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
@@ -0,0 +1,449 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional
+from utils.chunking import find_headings
+from utils.skills_analyzer import get_taxonomy
+
+# Points each check contributes to the 0-100 score
+CHECK_WEIGHTS = {
+    "sections": 25,
+    "keywords": 30,
+    "quantified": 20,
+    "acronyms": 10,
+    "formatting": 15,
+}
+SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+# Headings an ATS maps to each standard section
+SECTION_ALIASES = {
+    "summary": {"summary", "profile", "objective", "professional summary", "about me", "career objective"},
+    "experience": {"experience", "work experience", "professional experience", "employment history", "work history"},
+    "education": {"education", "academic background", "qualifications"},
+    "skills": {"skills", "technical skills", "core competencies", "key skills"},
+}
+REQUIRED_SECTIONS = ("experience", "education", "skills")
+RECOMMENDED_SECTIONS = ("summary",)
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+
+# Distinct role keywords for full marks, and the share of words outside the
+# skills section above which keywords read as stuffing
+KEYWORD_TARGET = 12
+KEYWORD_STUFFING_DENSITY = 0.15
+MISSING_KEYWORDS_SHOWN = 8
+
+# Bullet characters PDF extraction commonly yields; they are not icons
+BULLET_GLYPHS = "•▪◦●‣·■"
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*" + BULLET_GLYPHS + r"]|\d{1,2}[.)])\s+(.*)$")
+METRIC_PATTERN = re.compile(r"\d|%|\$|€|£|₹")
+# Share of bullets with a number, percentage or amount for full marks
+QUANTIFIED_TARGET = 0.5
+MIN_BULLET_WORDS = 4
+UNQUANTIFIED_SHOWN = 3
+
+ACRONYM_PATTERN = re.compile(r"\b[A-Z][A-Z0-9&]{1,6}(?:/[A-Z][A-Z0-9&]{0,6})?s?\b")
+PARENTHETICAL = re.compile(r"\(([^()\n]{2,80})\)")
+EXPANSION_WORD = re.compile(r"[^\W\d_][\w'&]*")
+# Characters before a parenthesis searched for the spelled-out form or acronym
+EXPANSION_CONTEXT = 120
+# Widely understood without expansion
+COMMON_ACRONYMS = {
+    "USA", "US", "UK", "EU", "UAE", "CEO", "CTO", "CFO", "COO", "VP", "HR", "IT", "GPA", "MBA", "PHD",
+    "BA", "BS", "BSC", "MA", "MS", "MSC", "BE", "BTECH", "MTECH", "PDF", "USD", "INR", "EUR", "GBP",
+    "INC", "LLC", "LTD", "AM", "PM", "ID", "OK", "TV", "FAQ", "API", "URL", "SQL", "HTML", "CSS",
+}
+UNEXPANDED_SHOWN = 6
+
+MIN_WORDS = 250
+MAX_WORDS = 1200
+MAX_PARAGRAPH_WORDS = 80
+COLUMN_GAP = re.compile(r"\S {4,}\S|\t")
+PAGE_MARKER = re.compile(r"^\s*page \d+( of \d+)?\s*$", re.IGNORECASE | re.MULTILINE)
+ROLE_IN_PROMPT = re.compile(
+    r"\b(?:for|as|targeting)\s+(?:an?\s+|the\s+)?([\w/+&.\- ]{2,40}?)\s+(?:role|position|job|jobs|opening)s?\b",
+    re.IGNORECASE,
+)
+
+
+def _acronym(token):
+    """An acronym token without its plural 's'"""
+    return token[:-1] if token.endswith("s") and token[:-1].isupper() else token
+
+
+def _letters(acronym):
+    return "".join(char for char in acronym if char.isalpha())
+
+
+def _finding(check, severity, message):
+    return {"check": check, "severity": severity, "message": message}
+
+
+def _canonical_section(heading):
+    name = heading.lower()
+    for section, aliases in SECTION_ALIASES.items():
+        if name in aliases:
+            return section
+    return None
+
+
+def check_sections(text):
+    """Standard section headings and contact details an ATS looks for"""
+    found = {}
+    for _, heading in find_headings(text):
+        section = _canonical_section(heading)
+        if section is not None:
+            found.setdefault(section, heading)
+    has_email = bool(EMAIL_PATTERN.search(text))
+    has_phone = bool(PHONE_PATTERN.search(text))
+
+    findings = []
+    for section in REQUIRED_SECTIONS:
+        if section not in found:
+            findings.append(_finding(
+                "sections", "high", f"No '{section.title()}' heading found; use a standard heading an ATS recognizes."
+            ))
+    for section in RECOMMENDED_SECTIONS:
+        if section not in found:
+            findings.append(_finding("sections", "low", f"Consider adding a short '{section.title()}' section."))
+    if not has_email:
+        findings.append(_finding("sections", "high", "No email address found in the text."))
+    if not has_phone:
+        findings.append(_finding("sections", "medium", "No phone number found in the text."))
+
+    # Required sections count fully; the summary, email and phone count half
+    earned = sum(section in found for section in REQUIRED_SECTIONS) + 0.5 * (
+        sum(section in found for section in RECOMMENDED_SECTIONS) + has_email + has_phone
+    )
+    possible = len(REQUIRED_SECTIONS) + 0.5 * (len(RECOMMENDED_SECTIONS) + 2)
+    return {
+        "score": earned / possible,
+        "details": {"sections": found, "has_email": has_email, "has_phone": has_phone},
+        "findings": findings,
+    }
+
+
+def section_spans(text, section):
+    """(start, end) of every part of text under a heading of the given standard section"""
+    headings = find_headings(text)
+    ends = [start for start, _ in headings[1:]] + [len(text)]
+    return [(start, end) for (start, heading), end in zip(headings, ends) if _canonical_section(heading) == section]
+
+
+def without_section(text, section):
+    """text with the given standard section cut out"""
+    for start, end in reversed(section_spans(text, section)):
+        text = text[:start] + text[end:]
+    return text
+
+
+def role_hits(text) -> Dict[str, int]:
+    """Whole-word occurrences of each ATS role's keywords in text, for roles that have any"""
+    taxonomy = get_taxonomy()
+    counts = taxonomy.role_matcher.count(text.lower())
+    hits = {role: sum(counts[keyword] for keyword in spec["keywords"]) for role, spec in taxonomy.ats_roles.items()}
+    return {role: count for role, count in hits.items() if count}
+
+
+def detect_roles(text) -> List[str]:
+    """ATS roles text is about, most mentioned first"""
+    hits = role_hits(text)
+    return sorted(hits, key=lambda role: -hits[role])
+
+
+def role_keywords(target_role, resume_text):
+    """
+    Skills an ATS would search for when screening for target_role, as the
+    skills named in the role and the (category, subcategory, skills) of
+    the ATS roles it matches. Without a role, or one matching no known
+    ATS role, the resume's main roles stand in for it: those with at least
+    half the keyword hits of the most mentioned one.
+    """
+    taxonomy = get_taxonomy()
+    named = set()
+    roles = []
+    if target_role:
+        named = taxonomy.find(target_role.lower())
+        roles = detect_roles(target_role)
+    if not roles and not named:
+        hits = role_hits(resume_text)
+        top = max(hits.values(), default=0)
+        roles = [role for role in detect_roles(resume_text) if hits[role] * 2 >= top]
+    return named, taxonomy.role_subcategories(roles)
+
+
+def suggest_missing(subcategories, matched, exclude, limit):
+    """
+    Up to limit unmatched skills, taken in turn from the subcategories the
+    resume already covers best, each in taxonomy order (most common first).
+    """
+    strength = [sum(skill in matched for skill in skills) for _, _, skills in subcategories]
+    ranked = sorted(range(len(subcategories)), key=lambda i: -strength[i])
+    if any(strength):
+        ranked = [i for i in ranked if strength[i]]
+    queues = [[skill for skill in subcategories[i][2] if skill not in matched and skill not in exclude] for i in ranked]
+
+    missing = []
+    while len(missing) < limit and any(queues):
+        for queue in queues:
+            if queue and len(missing) < limit:
+                skill = queue.pop(0)
+                if skill not in missing:
+                    missing.append(skill)
+    return missing
+
+
+def check_keywords(text, target_role=None):
+    """
+    How many of the target role's keywords appear, and how densely outside
+    the skills section (where a plain list of them is expected)
+    """
+    taxonomy = get_taxonomy()
+    named, subcategories = role_keywords(target_role, text)
+    keywords = {skill for _, _, skills in subcategories for skill in skills} | named
+    if not keywords:
+        # Unknown field: score against every skill in the taxonomy
+        keywords = set(taxonomy.terms())
+
+    counts = taxonomy.count(text.lower())
+    matched = {term: counts[term] for term in keywords if counts[term]}
+
+    body = without_section(text, "skills")
+    body_counts = taxonomy.count(body.lower())
+    body_words = len(body.split())
+    density = sum(body_counts[term] for term in matched) / body_words if body_words else 0.0
+
+    findings = []
+    missing_named = sorted(named - matched.keys())
+    if missing_named:
+        findings.append(_finding(
+            "keywords", "high", f"Keywords from the target role are missing: {', '.join(missing_named)}."
+        ))
+    if len(matched) < KEYWORD_TARGET:
+        missing = suggest_missing(subcategories, matched, named, MISSING_KEYWORDS_SHOWN)
+        findings.append(_finding(
+            "keywords", "medium" if matched else "high",
+            f"Only {len(matched)} relevant keywords found (aim for {KEYWORD_TARGET}+)"
+            + (f"; relevant terms you could add if they apply: {', '.join(missing)}." if missing else "."),
+        ))
+    if density > KEYWORD_STUFFING_DENSITY:
+        findings.append(_finding(
+            "keywords", "medium",
+            f"Keywords make up {density:.0%} of the text outside the skills section, which can read as keyword stuffing.",
+        ))
+
+    score = min(1.0, len(matched) / KEYWORD_TARGET)
+    if named:
+        score = 0.5 * score + 0.5 * (len(named & matched.keys()) / len(named))
+    if density > KEYWORD_STUFFING_DENSITY:
+        score *= 0.8
+    return {
+        "score": score,
+        "details": {
+            "target_role": target_role,
+            "categories": sorted({category for category, _, _ in subcategories}),
+            "matched": dict(sorted(matched.items(), key=lambda item: (-item[1], item[0]))),
+            "keywords_considered": len(keywords),
+            "density": round(density, 4),
+        },
+        "findings": findings,
+    }
+
+
+def achievement_lines(text):
+    """Bullet points of the resume; long non-heading lines if it has none"""
+    bullets = [match.group(1).strip() for match in map(BULLET_PATTERN.match, text.splitlines()) if match]
+    if not bullets:
+        headings = {heading for _, heading in find_headings(text)}
+        bullets = [line.strip() for line in text.splitlines() if line.strip() and line.strip() not in headings]
+    return [line for line in bullets if len(line.split()) >= MIN_BULLET_WORDS]
+
+
+def check_quantified(text):
+    """Share of achievement bullets backed by a number, percentage or amount"""
+    lines = achievement_lines(text)
+    quantified = [line for line in lines if METRIC_PATTERN.search(line)]
+    ratio = len(quantified) / len(lines) if lines else 0.0
+
+    findings = []
+    if not lines:
+        findings.append(_finding("quantified", "high", "No bullet points found; list achievements as bullets."))
+    elif ratio < QUANTIFIED_TARGET:
+        examples = [line for line in lines if not METRIC_PATTERN.search(line)][:UNQUANTIFIED_SHOWN]
+        findings.append(_finding(
+            "quantified", "medium" if ratio else "high",
+            f"{len(quantified)} of {len(lines)} bullets include a metric (aim for {QUANTIFIED_TARGET:.0%}); "
+            "add numbers to e.g.: " + "; ".join(f'"{line[:80]}"' for line in examples),
+        ))
+    return {
+        "score": min(1.0, ratio / QUANTIFIED_TARGET),
+        "details": {"bullets": len(lines), "quantified": len(quantified), "ratio": round(ratio, 3)},
+        "findings": findings,
+    }
+
+
+def _initials(words):
+    return "".join(word[0] for word in EXPANSION_WORD.findall(words)).upper()
+
+
+def _is_subsequence(letters, initials):
+    remaining = iter(initials)
+    return all(letter in remaining for letter in letters)
+
+
+def expanded_acronyms(text):
+    """
+    Acronyms spelled out next to themselves, as 'Full Name (FN)' or
+    'FN (Full Name)', found in one pass over the text's parentheses.
+    """
+    expanded = set()
+    for match in PARENTHETICAL.finditer(text):
+        inner = match.group(1).strip()
+        before = text[max(0, match.start() - EXPANSION_CONTEXT):match.start()]
+        if ACRONYM_PATTERN.fullmatch(inner):
+            acronym = _acronym(inner)
+            if _is_subsequence(_letters(acronym), _initials(before)[-2 * len(acronym):]):
+                expanded.add(acronym)
+        else:
+            previous = before.split()[-1] if before.strip() else ""
+            if ACRONYM_PATTERN.fullmatch(previous) and _is_subsequence(_letters(_acronym(previous)), _initials(inner)):
+                expanded.add(_acronym(previous))
+    return expanded
+
+
+def check_acronyms(text):
+    """Acronyms that are never spelled out, which keyword searches can miss"""
+    headings = {heading for _, heading in find_headings(text)}
+    acronyms = set()
+    for line in text.splitlines():
+        stripped = line.strip()
+        # All-caps lines are headings or names, not acronyms
+        if not stripped or stripped.rstrip(":") in headings or stripped.isupper():
+            continue
+        for match in ACRONYM_PATTERN.finditer(stripped):
+            acronym = _acronym(match.group())
+            if acronym not in COMMON_ACRONYMS:
+                acronyms.add(acronym)
+
+    unexpanded = sorted(acronyms - expanded_acronyms(text))
+    findings = []
+    if unexpanded:
+        shown = ", ".join(unexpanded[:UNEXPANDED_SHOWN]) + (" ..." if len(unexpanded) > UNEXPANDED_SHOWN else "")
+        findings.append(_finding(
+            "acronyms", "low",
+            f"{len(unexpanded)} acronyms are never spelled out ({shown}); write each in full once, "
+            "e.g. Machine Learning (ML).",
+        ))
+    return {
+        "score": 1.0 - len(unexpanded) / len(acronyms) if acronyms else 1.0,
+        "details": {"acronyms": len(acronyms), "unexpanded": unexpanded},
+        "findings": findings,
+    }
+
+
+def check_formatting(text):
+    """Layout problems that commonly break ATS parsing"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    words = len(text.split())
+    findings = []
+
+    if words < MIN_WORDS:
+        findings.append(_finding("formatting", "medium", f"The resume is short ({words} words); aim for {MIN_WORDS}+."))
+    elif words > MAX_WORDS:
+        findings.append(_finding(
+            "formatting", "low", f"The resume is long ({words} words); keep it to about {MAX_WORDS} or fewer."
+        ))
+
+    icons = {char for char in text if unicodedata.category(char) in ("So", "Co") and char not in BULLET_GLYPHS}
+    if icons:
+        findings.append(_finding(
+            "formatting", "medium", f"Icons or symbols ({' '.join(sorted(icons)[:8])}) may be dropped or garbled by an ATS."
+        ))
+
+    column_lines = sum(1 for line in lines if COLUMN_GAP.search(line.strip()) or line.count("|") >= 2)
+    if column_lines >= max(3, len(lines) // 10):
+        findings.append(_finding(
+            "formatting", "high", f"{column_lines} lines look like tables or columns; use a single-column layout."
+        ))
+
+    if "�" in text or "(cid:" in text:
+        findings.append(_finding(
+            "formatting", "high", "Some characters could not be extracted; the PDF may use embedded or image fonts."
+        ))
+
+    walls = sum(1 for line in lines if len(line.split()) > MAX_PARAGRAPH_WORDS)
+    if walls:
+        findings.append(_finding(
+            "formatting", "low", f"{walls} paragraphs run over {MAX_PARAGRAPH_WORDS} words; break them into bullets."
+        ))
+
+    if len(PAGE_MARKER.findall(text)) > 1:
+        findings.append(_finding("formatting", "low", "Page numbers in headers or footers end up in the parsed text."))
+
+    penalty = {"high": 0.4, "medium": 0.25, "low": 0.1}
+    return {
+        "score": max(0.0, 1.0 - sum(penalty[finding["severity"]] for finding in findings)),
+        "details": {"words": words, "lines": len(lines), "column_lines": column_lines},
+        "findings": findings,
+    }
+
+
+def target_role_from_prompt(prompt) -> Optional[str]:
+    """The role in a request like 'ATS score for a data analyst role', or None"""
+    match = ROLE_IN_PROMPT.search(prompt or "")
+    return match.group(1).strip() if match else None
+
+
+def score_resume(resume_text: str, target_role: Optional[str] = None) -> Dict:
+    """
+    Score a resume for ATS compatibility, without calling a model.
+
+    Returns the 0-100 score, each check's score (0-1), weight and details,
+    and every finding ordered by severity.
+    """
+    checks = {
+        "sections": check_sections(resume_text),
+        "keywords": check_keywords(resume_text, target_role),
+        "quantified": check_quantified(resume_text),
+        "acronyms": check_acronyms(resume_text),
+        "formatting": check_formatting(resume_text),
+    }
+    for name, check in checks.items():
+        check["weight"] = CHECK_WEIGHTS[name]
+        check["score"] = round(check["score"], 3)
+
+    findings: List[Dict] = sorted(
+        (finding for check in checks.values() for finding in check["findings"]),
+        key=lambda finding: SEVERITY_ORDER[finding["severity"]],
+    )
+    return {
+        "score": round(sum(check["score"] * check["weight"] for check in checks.values())),
+        "target_role": target_role,
+        "checks": checks,
+        "findings": findings,
+    }
+
+
+def format_ats_report(report: Dict) -> str:
+    """A compact markdown summary of score_resume() output"""
+    lines = [f"### ATS Score: {report['score']}/100"]
+    if report["target_role"]:
+        lines.append(f"Target role: {report['target_role']}")
+    for name, check in report["checks"].items():
+        lines.append(f"- {name}: {round(check['score'] * check['weight'])}/{check['weight']}")
+    matched = list(report["checks"]["keywords"]["details"]["matched"])
+    if matched:
+        lines.append(f"Keywords found: {', '.join(matched[:15])}")
+    if report["findings"]:
+        lines.append("Findings:")
+        lines += [f"- [{finding['severity']}] {finding['message']}" for finding in report["findings"]]
+    return "\n".join(lines)
+
+
+def generate_ats_suggestions(resume_text: str, target_role: Optional[str] = None):
+    """
+    ATS score and improvement findings for a resume, as markdown.
+    """
+    if not resume_text:
+        return "No resume content available for ATS analysis."
+    return format_ats_report(score_resume(resume_text, target_role))
@@ -0,0 +1,133 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.config import settings
+
+# Share of the progress bar each build stage accounts for
+STAGE_WEIGHTS = (("extract", 30), ("encode", 60), ("index", 10))
+
+QUEUED = "queued"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+class BuildJob:
+    """
+    Handle on an index build running in the background.
+
+    The build reports progress(stage, done, total) as it goes; the handle
+    turns that into the current stage and an overall percent that never
+    moves backwards. wait() blocks until the build ends.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.status = QUEUED
+        self.stage = None
+        self.percent = 0.0
+        self.error = None
+        self.result = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._fractions = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    @property
+    def ready(self):
+        return self.status == READY
+
+    def update(self, stage, done, total):
+        """Progress callback passed to VectorStore.build()"""
+        with self._lock:
+            self.stage = stage
+            self._fractions[stage] = min(done / total, 1.0) if total else 1.0
+            percent = sum(weight * self._fractions.get(name, 0.0) for name, weight in STAGE_WEIGHTS)
+            self.percent = max(self.percent, round(percent, 1))
+
+    def _start(self):
+        with self._lock:
+            self.status = RUNNING
+            self.started_at = time.time()
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.status = READY if result and error is None else FAILED
+            if self.status == READY:
+                self.percent = 100.0
+            self.finished_at = time.time()
+        self._finished.set()
+
+    def wait(self, timeout=None):
+        """Block until the build ends; returns False on timeout"""
+        return self._finished.wait(timeout)
+
+    def progress(self):
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "key": self.key,
+                "status": self.status,
+                "stage": self.stage,
+                "percent": self.percent,
+                "error": str(self.error) if self.error is not None else None,
+                "seconds": round(end - self.started_at, 2) if self.started_at else 0.0,
+            }
+
+
+class BuildJobRunner:
+    """
+    Runs builds on a small thread pool and keeps the latest job per key.
+    Threads rather than processes: the built index is published in this
+    process, and FAISS and the embedding model release the GIL while they
+    work.
+    """
+
+    def __init__(self, max_workers=None):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or settings.RAG_BUILD_WORKERS,
+            thread_name_prefix="rag-build",
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, build):
+        """
+        Start build(progress) in the background and return its BuildJob.
+        build returns a truthy value on success.
+        """
+        job = BuildJob(key)
+        with self._lock:
+            self._jobs[key] = job
+        self._pool.submit(self._run, job, build)
+        return job
+
+    @staticmethod
+    def _run(job, build):
+        job._start()
+        try:
+            job._finish(result=build(job.update))
+        except Exception as e:
+            print(f"❌ Background build {job.key} failed: {e}")
+            job._finish(error=e)
+
+    def get(self, key):
+        """The most recently submitted job for key, or None"""
+        with self._lock:
+            return self._jobs.get(key)
+
+    def forget(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def running(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done)
@@ -0,0 +1,172 @@
+"""
+Analyze many resumes in parallel and stream the results as JSONL.
+
+    python -m utils.bulk_analysis resumes/ --output skills.jsonl
+    python -m utils.bulk_analysis intake.jsonl --workers 8 --chunk-size 32
+
+The input is a directory, searched recursively for .txt and .pdf files, or
+a JSONL file whose records have an optional "id" and either "text" or a
+"path" (relative to the JSONL file). Each output line holds the record id,
+its source and the extract_skills() result, or an "error".
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from utils.ingest import load_text_from_file
+from utils.skills_analyzer import extract_skills, get_skill_matcher
+
+RESUME_EXTENSIONS = (".txt", ".pdf")
+PROGRESS_INTERVAL = 5.0
+
+
+def iter_directory(root):
+    """Yield {"id", "path"} records for resumes under root, in a stable order"""
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(RESUME_EXTENSIONS):
+                path = os.path.join(directory, name)
+                yield {"id": os.path.relpath(path, root), "path": path}
+
+
+def iter_jsonl(path):
+    """
+    Yield records from a JSONL file, one line at a time. A line that is not
+    a JSON object yields a record carrying only its "id" and an "error".
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": f"line-{line_number}", "error": f"JSONDecodeError: {e}"}
+                continue
+            if not isinstance(record, dict):
+                yield {"id": f"line-{line_number}", "error": f"expected a JSON object, got {type(record).__name__}"}
+                continue
+            record.setdefault("id", record.get("path") or f"line-{line_number}")
+            if "path" in record and not os.path.isabs(record["path"]):
+                record["path"] = os.path.join(base, record["path"])
+            yield record
+
+
+def iter_records(source):
+    if os.path.isdir(source):
+        return iter_directory(source)
+    return iter_jsonl(source)
+
+
+def chunked(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_record(record):
+    """extract_skills() for one record, with errors reported in the result"""
+    result = {"id": record["id"], "source": record.get("path", "inline")}
+    if "error" in record:
+        result["error"] = record["error"]
+        return result
+    try:
+        text = record["text"] if "text" in record else load_text_from_file(record["path"])
+        if not text.strip():
+            result["error"] = "no text extracted"
+            return result
+        result["chars"] = len(text)
+        result.update(extract_skills(text))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def analyze_chunk(records):
+    return [analyze_record(record) for record in records]
+
+
+def _init_worker():
+    # Library messages would corrupt JSONL written to stdout
+    sys.stdout = sys.stderr
+    get_skill_matcher()
+
+
+def analyze_resumes(records, workers=None, chunk_size=16, max_pending=None):
+    """
+    Yield analysis results for records, in input order.
+    Records are sent to a process pool in chunks of chunk_size, with at
+    most max_pending chunks in flight, so memory stays bounded however
+    many records there are.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 2
+
+    if workers <= 1:
+        get_skill_matcher()
+        for record in records:
+            yield analyze_record(record)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in chunked(records, chunk_size):
+            pending.append(pool.submit(analyze_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of resumes or JSONL file of records")
+    parser.add_argument("--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = one per CPU core)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="records per task")
+    parser.add_argument("--max-pending", type=int, default=0, help="tasks in flight (0 = 2 per worker)")
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = last_report = time.perf_counter()
+    done = failed = 0
+    try:
+        # Library messages go to stderr, keeping stdout pure JSONL
+        with contextlib.redirect_stdout(sys.stderr):
+            results = analyze_resumes(
+                iter_records(args.source),
+                workers=args.workers or None,
+                chunk_size=max(1, args.chunk_size),
+                max_pending=args.max_pending or None,
+            )
+            for result in results:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                done += 1
+                failed += "error" in result
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    out.flush()
+                    print(f"📊 {done} resumes, {done / (now - start):.1f} docs/s", file=sys.stderr)
+                    last_report = now
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed else 0.0
+    print(f"✅ Analyzed {done} resumes ({failed} failed) in {elapsed:.2f}s: {rate:.1f} docs/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
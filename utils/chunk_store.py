@@ -0,0 +1,312 @@
+import os
+import mmap
+import pickle
+from typing import NamedTuple, Optional
+import numpy as np
+
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunks.offsets.npy"
+LEGACY_CHUNKS_FILE = "chunks.pkl"
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "chunks.meta.npz"
+METADATA_KEYS = ("source", "page", "heading")
+
+
+class ChunkMetadata(NamedTuple):
+    """Where a chunk came from: file, 1-based page (0 if none), char range, heading"""
+    source: str
+    page: int
+    start: int
+    end: int
+    heading: Optional[str]
+
+
+def metadata_path_for(blob_path):
+    """The metadata table that belongs next to a chunk blob"""
+    return os.path.join(os.path.dirname(blob_path), METADATA_FILE)
+
+
+def _join_strings(strings):
+    # Paths and headings never contain newlines, so one joined blob is enough
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _split_strings(blob):
+    text = blob.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+
+class ChunkStore:
+    """
+    Read-only chunk texts addressed by FAISS id.
+
+    Texts live in one UTF-8 blob and an (n, 3) int64 array of
+    (id, start, end) rows sorted by id. Both are memory-mapped, so opening
+    the store is O(1) and only the chunks that are looked up get decoded.
+    The pages are shared between processes through the OS page cache.
+    """
+
+    def __init__(self, blob_path=CHUNKS_FILE, offsets_path=OFFSETS_FILE, metadata_path=None):
+        self.blob_path = blob_path
+        self.offsets_path = offsets_path
+        self.metadata_path = metadata_path or metadata_path_for(blob_path)
+        self._metadata = None
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        self._file = open(blob_path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._blob = b""
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _row(self, chunk_id):
+        ids = self._offsets[:, 0]
+        pos = int(np.searchsorted(ids, chunk_id))
+        if pos < len(ids) and ids[pos] == chunk_id:
+            return pos
+        return None
+
+    def rows(self, chunk_ids):
+        """Row positions of chunk_ids in id order; ids must be present"""
+        return np.searchsorted(self._offsets[:, 0], np.asarray(chunk_ids, dtype=np.int64))
+
+    def __contains__(self, chunk_id):
+        return self._row(int(chunk_id)) is not None
+
+    def __getitem__(self, chunk_id):
+        row = self._row(int(chunk_id))
+        if row is None:
+            raise KeyError(chunk_id)
+        _, start, end = self._offsets[row]
+        return self._blob[start:end].decode("utf-8")
+
+    def __iter__(self):
+        return self.keys()
+
+    def get(self, chunk_id, default=None):
+        try:
+            return self[chunk_id]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return (int(chunk_id) for chunk_id in self._offsets[:, 0])
+
+    def values(self):
+        return (self._blob[start:end].decode("utf-8") for _, start, end in self._offsets)
+
+    def items(self):
+        return (
+            (int(chunk_id), self._blob[start:end].decode("utf-8"))
+            for chunk_id, start, end in self._offsets
+        )
+
+    def _metadata_table(self):
+        """Columns aligned with the offsets rows, loaded on first use; None if absent"""
+        if self._metadata is None:
+            if not os.path.exists(self.metadata_path):
+                return None
+            with np.load(self.metadata_path) as data:
+                table = {name: data[name] for name in ("source", "page", "start", "end", "heading")}
+                table["files"] = _split_strings(data["files"])
+                table["headings"] = _split_strings(data["headings"])
+            self._metadata = table
+        return self._metadata
+
+    def metadata(self, chunk_id):
+        """ChunkMetadata of a chunk, or None if the store has no metadata"""
+        table = self._metadata_table()
+        row = self._row(int(chunk_id))
+        if table is None or row is None:
+            return None
+        heading = int(table["heading"][row])
+        return ChunkMetadata(
+            table["files"][table["source"][row]],
+            int(table["page"][row]),
+            int(table["start"][row]),
+            int(table["end"][row]),
+            table["headings"][heading] if heading >= 0 else None,
+        )
+
+    def select(self, filter):
+        """
+        Ids of the chunks matching filter, a dict of metadata values:
+        {"source": "resume.pdf", "page": [1, 2], "heading": "Experience"}.
+        A value may be one value or a list; source matches a full path or
+        a file name, heading matches case-insensitively.
+        """
+        unknown = set(filter) - set(METADATA_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown filter keys {sorted(unknown)}, expected {METADATA_KEYS}")
+
+        table = self._metadata_table()
+        if table is None:
+            return np.zeros(0, dtype=np.int64)
+
+        def values(key):
+            value = filter[key]
+            return list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+
+        mask = np.ones(len(self), dtype=bool)
+        if "source" in filter:
+            wanted = {str(v) for v in values("source")}
+            files = [i for i, path in enumerate(table["files"]) if path in wanted or os.path.basename(path) in wanted]
+            mask &= np.isin(table["source"], files)
+        if "page" in filter:
+            mask &= np.isin(table["page"], [int(v) for v in values("page")])
+        if "heading" in filter:
+            wanted = {str(v).lower() for v in values("heading")}
+            headings = [i for i, heading in enumerate(table["headings"]) if heading.lower() in wanted]
+            mask &= np.isin(table["heading"], headings)
+        return np.asarray(self._offsets[mask, 0], dtype=np.int64)
+
+    def close(self):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+
+
+class ChunkStoreWriter:
+    """
+    Stream (id, text, metadata) into a new chunk store.
+    Texts are appended to the blob in arrival order and the offsets are
+    sorted by id on commit(); files are written next to the targets and
+    renamed into place, so open stores keep reading their old mapping.
+    Metadata is written as a columnar side table in the same row order.
+    """
+
+    def __init__(self, blob_path=CHUNKS_FILE, offsets_path=OFFSETS_FILE, metadata_path=None):
+        self.blob_path = blob_path
+        self.offsets_path = offsets_path
+        self.metadata_path = metadata_path or metadata_path_for(blob_path)
+        self._blob_tmp = blob_path + ".tmp"
+        self._offsets_tmp = offsets_path + ".tmp.npy"
+        self._metadata_tmp = self.metadata_path + ".tmp.npz"
+        self._file = open(self._blob_tmp, "wb")
+        self._position = 0
+        self._rows = []
+        self._metadata = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, chunk_id, text, metadata=None):
+        data = text.encode("utf-8")
+        self._file.write(data)
+        self._rows.append((chunk_id, self._position, self._position + len(data)))
+        self._metadata.append(metadata)
+        self._position += len(data)
+
+    def _write_metadata(self, order):
+        files, headings = {}, {}
+        columns = {name: [] for name in ("source", "page", "start", "end", "heading")}
+        for row in order:
+            meta = self._metadata[row] or ChunkMetadata("", 0, 0, 0, None)
+            columns["source"].append(files.setdefault(meta.source, len(files)))
+            columns["page"].append(meta.page)
+            columns["start"].append(meta.start)
+            columns["end"].append(meta.end)
+            columns["heading"].append(-1 if meta.heading is None else headings.setdefault(meta.heading, len(headings)))
+
+        with open(self._metadata_tmp, "wb") as f:
+            np.savez(
+                f,
+                source=np.array(columns["source"], dtype=np.int32),
+                page=np.array(columns["page"], dtype=np.int32),
+                start=np.array(columns["start"], dtype=np.int64),
+                end=np.array(columns["end"], dtype=np.int64),
+                heading=np.array(columns["heading"], dtype=np.int32),
+                files=_join_strings(files),
+                headings=_join_strings(headings),
+            )
+            f.flush()
+            os.fsync(f.fileno())
+
+    def commit(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        rows = np.array(self._rows, dtype=np.int64).reshape(-1, 3)
+        order = np.argsort(rows[:, 0], kind="stable")
+        with open(self._offsets_tmp, "wb") as f:
+            np.save(f, rows[order])
+            f.flush()
+            os.fsync(f.fileno())
+        has_metadata = any(meta is not None for meta in self._metadata)
+        if has_metadata:
+            self._write_metadata(order)
+        os.replace(self._blob_tmp, self.blob_path)
+        os.replace(self._offsets_tmp, self.offsets_path)
+        if has_metadata:
+            os.replace(self._metadata_tmp, self.metadata_path)
+
+    def abort(self):
+        self._file.close()
+        for path in (self._blob_tmp, self._offsets_tmp, self._metadata_tmp):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def write_chunk_store(items, blob_path=CHUNKS_FILE, offsets_path=OFFSETS_FILE):
+    """Write (id, text) pairs to a chunk store"""
+    writer = ChunkStoreWriter(blob_path, offsets_path)
+    try:
+        for chunk_id, text in items:
+            writer.add(chunk_id, text)
+        writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+
+
+def chunk_store_exists(blob_path=CHUNKS_FILE, offsets_path=OFFSETS_FILE):
+    return os.path.exists(blob_path) and os.path.exists(offsets_path)
+
+
+def open_chunk_store(
+    blob_path=CHUNKS_FILE,
+    offsets_path=OFFSETS_FILE,
+    legacy_path=LEGACY_CHUNKS_FILE,
+    metadata_path=None,
+):
+    """
+    Open the chunk store, converting a legacy chunks.pkl on first use.
+    Returns None if neither format exists. Legacy stores have no metadata.
+    """
+    if not chunk_store_exists(blob_path, offsets_path):
+        if not os.path.exists(legacy_path):
+            return None
+
+        print(f"🔄 Converting {legacy_path} to a memory-mapped chunk store...")
+        with open(legacy_path, "rb") as f:
+            legacy = pickle.load(f)
+
+        # Older builds pickled a plain list aligned with a flat index
+        if isinstance(legacy, list):
+            legacy = dict(enumerate(legacy))
+        write_chunk_store(legacy.items(), blob_path, offsets_path)
+
+    return ChunkStore(blob_path, offsets_path, metadata_path)
+
+
+def write_vectors(ids, vectors, path=VECTORS_FILE):
+    """
+    Write exact float32 vectors as rows sorted by id, aligned with the
+    offsets of a chunk store holding the same ids.
+    """
+    order = np.argsort(np.asarray(ids, dtype=np.int64), kind="stable")
+    tmp_path = path + ".tmp.npy"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(vectors[order], dtype=np.float32))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def open_vectors(path=VECTORS_FILE):
+    """Memory-map vectors written by write_vectors, or None if missing"""
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode="r")
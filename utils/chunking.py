@@ -0,0 +1,148 @@
+import re
+from bisect import bisect_right
+from typing import List, NamedTuple
+
+WORD_PATTERN = re.compile(r"\S+")
+LINE_PATTERN = re.compile(r"[^\n]+")
+
+SECTION_HEADINGS = {
+    "summary", "profile", "objective", "professional summary", "experience",
+    "work experience", "professional experience", "employment history",
+    "education", "skills", "technical skills", "projects", "certifications",
+    "awards", "achievements", "publications", "languages", "interests",
+    "volunteering", "volunteer experience", "references", "contact",
+}
+MAX_HEADING_WORDS = 6
+# Bump when chunk boundaries change, so indexes built with the old ones are rebuilt
+CHUNKER_VERSION = 2
+
+
+class TextChunk(NamedTuple):
+    """A chunk of source text and the character range it was cut from"""
+    text: str
+    start: int
+    end: int
+    num_tokens: int
+
+
+def split_into_chunks(text, max_length=300):
+    """Split text into chunks of approximately max_length words"""
+    words = text.split()
+    result = []
+    current = []
+
+    for w in words:
+        current.append(w)
+        if len(current) >= max_length:
+            result.append(" ".join(current))
+            current = []
+
+    if current:
+        result.append(" ".join(current))
+
+    return result
+
+
+def token_spans(text, tokenizer=None):
+    """
+    Return the (start, end) character span of every token in text.
+    Uses a Hugging Face fast tokenizer's offset mapping when one is given
+    and falls back to whitespace-delimited words otherwise.
+    """
+    if tokenizer is not None:
+        try:
+            encoded = tokenizer(
+                text,
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                verbose=False,
+            )
+            return encoded["offset_mapping"]
+        except (NotImplementedError, TypeError, ValueError):
+            # Slow tokenizers cannot report offsets
+            pass
+
+    return [match.span() for match in WORD_PATTERN.finditer(text)]
+
+
+def word_starts(text, spans):
+    """
+    Indices of the tokens in spans that begin a word. Subword tokenizers
+    split words into pieces ("inter", "##net"); a piece directly after a
+    letter or digit continues the word before it.
+    """
+    starts = []
+    for i, (start, _) in enumerate(spans):
+        if (
+            i == 0
+            or start > spans[i - 1][1]
+            or start >= len(text)
+            or not text[start].isalnum()
+            or not text[start - 1].isalnum()
+        ):
+            starts.append(i)
+    return starts
+
+
+def split_into_token_chunks(text, max_tokens=254, overlap=32, tokenizer=None) -> List[TextChunk]:
+    """
+    Split text into windows of at most max_tokens tokens.
+
+    Consecutive windows share about `overlap` tokens. Windows start and end
+    on word boundaries, so re-tokenizing a chunk gives back the same
+    tokens rather than more pieces of a cut word; only a single word
+    longer than max_tokens is cut. The text is tokenized once and every
+    chunk is a slice of the original string, so chunk.start and chunk.end
+    point back into the source.
+    """
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+
+    spans = token_spans(text, tokenizer)
+    starts = word_starts(text, spans)
+    result = []
+
+    first = 0
+    while first < len(spans):
+        stop = min(first + max_tokens, len(spans))
+        if stop < len(spans):
+            # End before the last word start that fits
+            boundary = starts[bisect_right(starts, stop) - 1]
+            if boundary > first:
+                stop = boundary
+        start, end = spans[first][0], spans[stop - 1][1]
+        result.append(TextChunk(text[start:end], start, end, stop - first))
+        if stop == len(spans):
+            break
+
+        # Back up about `overlap` tokens to a word start, always moving forward
+        target = max(stop - overlap, first + 1)
+        following = bisect_right(starts, first)
+        candidate = starts[bisect_right(starts, target) - 1]
+        if candidate > first:
+            first = candidate
+        elif following < len(starts) and starts[following] <= stop:
+            first = starts[following]
+        else:
+            first = target
+
+    return result
+
+
+def is_heading(line):
+    """Whether a line looks like a section heading of a resume or document"""
+    line = line.strip()
+    words = line.split()
+    if not words or len(words) > MAX_HEADING_WORDS or line[-1] in ".,;":
+        return False
+    name = line.rstrip(":").strip().lower()
+    return name in SECTION_HEADINGS or line.endswith(":") or (line.isupper() and len(line) > 2)
+
+
+def find_headings(text):
+    """Return (start, heading) for every heading line in text, in order"""
+    return [
+        (match.start(), match.group().strip().rstrip(":").strip())
+        for match in LINE_PATTERN.finditer(text)
+        if is_heading(match.group())
+    ]
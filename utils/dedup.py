@@ -0,0 +1,65 @@
+import re
+import hashlib
+import numpy as np
+
+SIMHASH_BITS = 64
+# Four 16-bit bands: two hashes within 3 bits share at least one band exactly
+LSH_BANDS = 4
+SHINGLE_SIZE = 3
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _hash64(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text):
+    """
+    64-bit SimHash of text over word 3-gram shingles.
+    Texts that differ by a few words hash a few bits apart.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) >= SHINGLE_SIZE:
+        features = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    else:
+        features = tokens
+    if not features:
+        return 0
+
+    hashes = np.array([_hash64(feature) for feature in features], dtype=np.uint64)
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int.from_bytes(np.packbits(votes > 0, bitorder="little").tobytes(), "little")
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    SimHash LSH index mapping chunk fingerprints to chunk ids.
+    find() returns the id of an indexed chunk within max_distance bits,
+    or None; candidates are only compared when they share a band.
+    """
+
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        self._band_bits = SIMHASH_BITS // LSH_BANDS
+        self._bands = [{} for _ in range(LSH_BANDS)]
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (band * self._band_bits)) & mask for band in range(LSH_BANDS)]
+
+    def add(self, fingerprint, chunk_id):
+        for band, key in zip(self._bands, self._band_keys(fingerprint)):
+            band.setdefault(key, []).append((fingerprint, chunk_id))
+
+    def find(self, fingerprint):
+        for band, key in zip(self._bands, self._band_keys(fingerprint)):
+            for candidate, chunk_id in band.get(key, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return chunk_id
+        return None
@@ -0,0 +1,265 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+import numpy as np
+from config.config import settings
+from utils.atomic_io import atomic_write_json
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): a cache directory must then be used by one process at a time
+    fcntl = None
+
+VECTORS_FILE = "vectors.f32"
+KEYS_FILE = "keys.npy"
+CLOCK_FILE = "clock.npy"
+META_FILE = "cache.json"
+LOCK_FILE = "cache.lock"
+KEY_BYTES = 32
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cache_key(model_id, text):
+    """sha256 of the model id and chunk text, as raw bytes"""
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    On-disk, content-addressed cache of chunk embeddings.
+
+    Vectors live in a fixed-capacity float32 file that is memory-mapped;
+    a small key index (one sha256 per slot plus a last-used tick) maps
+    content to slots. When the cache is full the least recently used slots
+    are reused. Evicted slots are unlinked from the key index on disk
+    before they are overwritten, so a crash can lose entries but never
+    return a vector for the wrong text.
+
+    Several processes may share a directory. Lookups hold a shared flock on
+    the directory's lock file and writes an exclusive one; each reloads the
+    key index when another process saved a newer one, and every write
+    saves it before releasing the lock, so no two processes fill the same
+    slot. Lookups only bump recency in memory; it is merged into the index
+    on the next write or flush. Without flock (Windows) a directory must
+    only be used by one process at a time.
+    """
+
+    def __init__(self, directory, model_id, dim, capacity):
+        self.directory = directory
+        self.model_id = model_id
+        self.dim = dim
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, LOCK_FILE), "a+b")
+        meta = {"model": model_id, "dim": dim, "capacity": capacity}
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        with self._file_lock(exclusive=True):
+            if self._read_meta() == meta and os.path.exists(vectors_path):
+                self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+                self._keys = np.load(os.path.join(directory, KEYS_FILE))
+                self._clock = np.load(os.path.join(directory, CLOCK_FILE))
+            else:
+                # New cache, or the model/size changed: start empty
+                self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="w+", shape=(capacity, dim))
+                self._keys = np.zeros((capacity, KEY_BYTES), dtype=np.uint8)
+                self._clock = np.zeros(capacity, dtype=np.int64)
+                self._save_index()
+                atomic_write_json(os.path.join(directory, META_FILE), meta)
+            self._stamp = self._index_stamp()
+
+        self._index_slots()
+        self._tick = int(self._clock.max()) if capacity else 0
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        """Hold the directory's flock, shared or exclusive, against other processes"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _index_slots(self):
+        # A zero tick marks a free slot
+        self._slots = {self._keys[slot].tobytes(): int(slot) for slot in np.flatnonzero(self._clock)}
+
+    def _index_stamp(self):
+        stamps = []
+        for name in (KEYS_FILE, CLOCK_FILE):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                return None
+            stamps.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+
+    def _reload_index(self):
+        """
+        Load the key index if another process saved one since we last did.
+        Call with the file lock held.
+        """
+        stamp = self._index_stamp()
+        if stamp == self._stamp:
+            return
+        keys = np.load(os.path.join(self.directory, KEYS_FILE))
+        clock = np.load(os.path.join(self.directory, CLOCK_FILE))
+        # Keep the recency of our own lookups for slots that still hold the same key
+        same = (clock > 0) & np.all(keys == self._keys, axis=1)
+        clock[same] = np.maximum(clock[same], self._clock[same])
+        self._keys, self._clock = keys, clock
+        self._index_slots()
+        self._tick = max(self._tick, int(clock.max()) if self.capacity else 0)
+        self._stamp = stamp
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.directory, META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_index(self):
+        for name, array in ((KEYS_FILE, self._keys), (CLOCK_FILE, self._clock)):
+            path = os.path.join(self.directory, name)
+            with open(path + ".tmp.npy", "wb") as f:
+                np.save(f, array)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp.npy", path)
+        self._stamp = self._index_stamp()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def get_many(self, texts):
+        """
+        Look texts up. Returns (vectors, missing) where vectors is an
+        (n, dim) float32 matrix with the cached rows filled in and missing
+        lists the positions that still need encoding.
+        """
+        keys = [cache_key(self.model_id, text) for text in texts]
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        missing = []
+
+        with self._lock, self._file_lock(exclusive=False):
+            self._reload_index()
+            for row, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is None:
+                    missing.append(row)
+                    continue
+                vectors[row] = self._vectors[slot]
+                self._tick += 1
+                self._clock[slot] = self._tick
+            self._stats["hits"] += len(texts) - len(missing)
+            self._stats["misses"] += len(missing)
+
+        return vectors, missing
+
+    def put_many(self, texts, vectors):
+        """
+        Store vectors for texts, evicting least recently used entries. The
+        key index is saved before returning, so other processes see them.
+        """
+        if not self.capacity:
+            return
+
+        with self._lock, self._file_lock(exclusive=True):
+            self._reload_index()
+            new = {}
+            for text, vector in zip(texts, vectors):
+                key = cache_key(self.model_id, text)
+                if key not in self._slots:
+                    new[key] = vector
+            if not new:
+                return
+            # A batch larger than the cache keeps its last rows
+            new = dict(list(new.items())[-self.capacity:])
+
+            free = np.flatnonzero(self._clock == 0)[:len(new)]
+            slots = list(free)
+            needed = len(new) - len(slots)
+            if needed:
+                used = np.flatnonzero(self._clock)
+                victims = used[np.argpartition(self._clock[used], needed - 1)[:needed]]
+                for slot in victims:
+                    del self._slots[self._keys[slot].tobytes()]
+                    self._keys[slot] = 0
+                    self._clock[slot] = 0
+                self._stats["evictions"] += needed
+                # Unlink victims on disk before their vectors are overwritten
+                self._save_index()
+                slots.extend(victims)
+
+            for slot, (key, vector) in zip(slots, new.items()):
+                self._vectors[slot] = vector
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._tick += 1
+                self._clock[slot] = self._tick
+                self._slots[key] = int(slot)
+            self._vectors.flush()
+            self._save_index()
+
+    def flush(self):
+        """Write vectors, then the key index with our lookups' recency, to disk"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._reload_index()
+            self._vectors.flush()
+            self._save_index()
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self._stats["hits"], self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "entries": len(self._slots),
+                "capacity": self.capacity,
+                "max_bytes": self.capacity * (self.dim * 4 + KEY_BYTES + 8),
+            }
+
+
+def get_embedding_cache(model_id, dim):
+    """
+    Return the process-wide embedding cache for a model, shared by every
+    index and session, or None when RAG_EMBEDDING_CACHE_MB is 0.
+    """
+    if settings.RAG_EMBEDDING_CACHE_MB <= 0:
+        return None
+
+    with _caches_lock:
+        cache = _caches.get(model_id)
+        if cache is None or cache.dim != dim:
+            directory = os.path.join(settings.RAG_EMBEDDING_CACHE_DIR, re.sub(r"[^A-Za-z0-9._-]", "_", model_id))
+            capacity = settings.RAG_EMBEDDING_CACHE_MB * 2**20 // (dim * 4 + KEY_BYTES + 8)
+            cache = EmbeddingCache(directory, model_id, dim, capacity)
+            _caches[model_id] = cache
+        return cache
+
+
+def encode_with_cache(encode, texts, cache):
+    """
+    Encode texts, serving known ones from cache and storing the rest.
+    encode(texts) must return an (n, dim) float32 matrix.
+    """
+    if cache is None:
+        return np.asarray(encode(texts), dtype=np.float32)
+
+    vectors, missing = cache.get_many(texts)
+    if missing:
+        encoded = np.asarray(encode([texts[row] for row in missing]), dtype=np.float32)
+        vectors[missing] = encoded
+        cache.put_many([texts[row] for row in missing], encoded)
+    return vectors
@@ -0,0 +1,358 @@
+import os
+import json
+import math
+import numpy as np
+import faiss
+from config.config import settings
+from utils.atomic_io import atomic_write_json
+
+TRAINED_INDEX_FILE = "trained_index.faiss"
+
+# IVF needs enough points per centroid to train meaningfully
+IVF_MIN_POINTS_PER_LIST = 39
+IVF_MIN_VECTORS = 1000
+MAX_TRAINING_VECTORS = 100000
+
+STORAGE_TYPES = ("float32", "int8", "pq")
+# int8 ranges fitted to a handful of vectors clip most later ones
+SQ_MIN_TRAINING_VECTORS = 256
+# A trained index is retrained once the corpus outgrows its sample this much
+RETRAIN_GROWTH = 2
+# k-means over the 2**nbits centroids of each PQ sub-quantizer
+PQ_MIN_POINTS_PER_CENTROID = 39
+
+
+def choose_index_type(num_vectors):
+    """
+    Pick the index type for a corpus of num_vectors vectors.
+    "auto" keeps exact search for small corpora and switches to IVF above
+    RAG_FLAT_MAX_VECTORS; an explicit RAG_INDEX_TYPE is honoured except
+    when there are too few vectors to train IVF.
+    """
+    index_type = settings.RAG_INDEX_TYPE.lower()
+
+    if index_type == "auto":
+        index_type = "flat" if num_vectors <= settings.RAG_FLAT_MAX_VECTORS else "ivf"
+
+    if index_type not in ("flat", "ivf", "hnsw"):
+        print(f"⚠️ Unknown RAG_INDEX_TYPE '{settings.RAG_INDEX_TYPE}', using flat")
+        return "flat"
+
+    if index_type == "ivf" and num_vectors < IVF_MIN_VECTORS:
+        return "flat"
+
+    return index_type
+
+
+def choose_storage(num_vectors):
+    """
+    Pick how vectors are stored: float32, int8 scalar quantization or PQ codes.
+    PQ falls back to int8 until there are enough vectors to train its codebooks.
+    """
+    storage = settings.RAG_VECTOR_STORAGE.lower()
+
+    if storage not in STORAGE_TYPES:
+        print(f"⚠️ Unknown RAG_VECTOR_STORAGE '{settings.RAG_VECTOR_STORAGE}', using float32")
+        return "float32"
+
+    if storage == "pq" and num_vectors < PQ_MIN_POINTS_PER_CENTROID * (1 << settings.RAG_PQ_NBITS):
+        storage = "int8"
+
+    if storage == "int8" and num_vectors < SQ_MIN_TRAINING_VECTORS:
+        return "float32"
+
+    return storage
+
+
+def ivf_nlist(num_vectors):
+    """Number of IVF lists for a corpus, ~4*sqrt(N) bounded by training size"""
+    nlist = int(4 * math.sqrt(num_vectors))
+    return max(1, min(nlist, num_vectors // IVF_MIN_POINTS_PER_LIST))
+
+
+def pq_subquantizers(dim):
+    """Largest number of PQ sub-quantizers <= RAG_PQ_M that divides dim"""
+    m = max(1, min(settings.RAG_PQ_M, dim))
+    while dim % m:
+        m -= 1
+    return m
+
+
+def new_index(dim, index_type, storage, num_vectors):
+    """Create an empty, possibly untrained, index of the given type and storage"""
+    sq_8bit = faiss.ScalarQuantizer.QT_8bit
+
+    if index_type == "ivf":
+        quantizer = faiss.IndexFlatL2(dim)
+        nlist = ivf_nlist(num_vectors)
+        if storage == "int8":
+            return faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, sq_8bit, faiss.METRIC_L2)
+        if storage == "pq":
+            return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_subquantizers(dim), settings.RAG_PQ_NBITS)
+        return faiss.IndexIVFFlat(quantizer, dim, nlist)
+
+    if index_type == "hnsw":
+        if storage == "int8":
+            index = faiss.IndexHNSWSQ(dim, sq_8bit, settings.RAG_HNSW_M)
+        elif storage == "pq":
+            index = faiss.IndexHNSWPQ(dim, pq_subquantizers(dim), settings.RAG_HNSW_M)
+        else:
+            index = faiss.IndexHNSWFlat(dim, settings.RAG_HNSW_M)
+        index.hnsw.efConstruction = settings.RAG_HNSW_EF_CONSTRUCTION
+        return index
+
+    if storage == "int8":
+        return faiss.IndexScalarQuantizer(dim, sq_8bit, faiss.METRIC_L2)
+    if storage == "pq":
+        return faiss.IndexPQ(dim, pq_subquantizers(dim), settings.RAG_PQ_NBITS)
+    return faiss.IndexFlatL2(dim)
+
+
+def _training_meta_path(trained_path):
+    return trained_path + ".json"
+
+
+def trained_sample_size(trained_path=TRAINED_INDEX_FILE):
+    """Number of vectors the persisted trained index was trained on, or None"""
+    try:
+        with open(_training_meta_path(trained_path), "r", encoding="utf-8") as f:
+            return int(json.load(f)["trained_on"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def needs_training(index_type, storage):
+    """Whether an index of this type and storage learns from its vectors"""
+    return index_type == "ivf" or storage != "float32"
+
+
+def needs_retraining(index_type, storage, num_vectors, trained_path=TRAINED_INDEX_FILE):
+    """Whether a trained index has been outgrown by a corpus of num_vectors"""
+    if not needs_training(index_type, storage):
+        return False
+    trained_on = trained_sample_size(trained_path)
+    if trained_on is None:
+        return True
+    # Samples are capped, so a full-size sample is never outgrown
+    return trained_on < MAX_TRAINING_VECTORS and num_vectors > trained_on * RETRAIN_GROWTH
+
+
+def load_trained_index(dim, index_type, storage, num_vectors, trained_path=TRAINED_INDEX_FILE):
+    """
+    Return a persisted trained (empty) index if it matches the requested one
+    and was trained on a sample representative of num_vectors.
+    """
+    try:
+        if not os.path.exists(trained_path) or needs_retraining(index_type, storage, num_vectors, trained_path):
+            return None
+        trained = faiss.read_index(trained_path)
+        if (
+            trained.d != dim
+            or not trained.is_trained
+            or describe_index(trained) != index_type
+            or describe_storage(trained) != storage
+        ):
+            return None
+        # Reuse IVF lists until the corpus size calls for 2x more/fewer lists
+        if index_type == "ivf":
+            nlist = ivf_nlist(num_vectors)
+            if not nlist / 2 <= trained.nlist <= nlist * 2:
+                return None
+        return trained
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable trained index: {e}")
+    return None
+
+
+def train_index(vectors, index_type, storage, trained_path=TRAINED_INDEX_FILE, force=False):
+    """
+    Return a trained, empty index for vectors.
+    Indexes that need training (IVF lists, int8 ranges, PQ codebooks) are
+    trained on a sample and persisted to trained_path, with the sample size,
+    for later builds. force always trains afresh.
+    """
+    num_vectors, dim = vectors.shape
+
+    index = None if force else load_trained_index(dim, index_type, storage, num_vectors, trained_path)
+    if index is not None:
+        print(f"📂 Reusing trained {index_type}/{storage} index")
+        return index
+
+    index = new_index(dim, index_type, storage, num_vectors)
+    if not index.is_trained:
+        print(f"🏋️ Training {index_type}/{storage} index on {num_vectors} vectors...")
+        sample = vectors
+        if num_vectors > MAX_TRAINING_VECTORS:
+            rows = np.random.default_rng(0).choice(num_vectors, MAX_TRAINING_VECTORS, replace=False)
+            sample = vectors[rows]
+        index.train(sample)
+        faiss.write_index(index, trained_path + ".tmp")
+        os.replace(trained_path + ".tmp", trained_path)
+        atomic_write_json(_training_meta_path(trained_path), {"trained_on": len(sample)})
+    return index
+
+
+def create_index(vectors, index_type=None, trained_path=TRAINED_INDEX_FILE, storage=None, force=False):
+    """
+    Create an empty index suited to the given vectors.
+    The vectors are only used for sizing and training; callers add them
+    with add_with_ids afterwards.
+    """
+    num_vectors, dim = vectors.shape
+    index_type = index_type or choose_index_type(num_vectors)
+    storage = storage or choose_storage(num_vectors)
+
+    index = train_index(vectors, index_type, storage, trained_path, force)
+    if index_type == "ivf":
+        # Hashtable direct map allows remove_ids and reconstruct by arbitrary id
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    else:
+        index = faiss.IndexIDMap2(index)
+
+    apply_search_params(index)
+    return index
+
+
+def _unwrap(index):
+    """The index inside an IndexIDMap, or index itself"""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def describe_index(index):
+    """Return "flat", "ivf" or "hnsw" for an index, or None if unknown"""
+    if index is None:
+        return None
+
+    index = _unwrap(index)
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, (faiss.IndexFlat, faiss.IndexScalarQuantizer, faiss.IndexPQ)):
+        return "flat"
+    return None
+
+
+def describe_storage(index):
+    """Return "float32", "int8" or "pq" for how an index stores its vectors"""
+    if index is None:
+        return None
+
+    index = _unwrap(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "int8"
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    return "float32"
+
+
+def has_stable_ids(index):
+    """Whether vectors in the index are addressed by caller-assigned ids"""
+    if isinstance(index, faiss.IndexIDMap):
+        return True
+    return isinstance(index, faiss.IndexIVF) and index.direct_map.type == faiss.DirectMap.Hashtable
+
+
+def supports_removal(index):
+    """Whether remove_ids can be used; HNSW graphs must be rebuilt instead"""
+    return has_stable_ids(index) and describe_index(index) != "hnsw"
+
+
+def supports_id_selector(index):
+    """Whether searches can take an ID selector; a flat IndexPQ rejects any search parameters"""
+    return not isinstance(_unwrap(index), faiss.IndexPQ)
+
+
+def apply_search_params(index):
+    """Apply the configured recall/latency knobs (nprobe, efSearch)"""
+    index_type = describe_index(index)
+
+    if index_type == "ivf":
+        index.nprobe = min(settings.RAG_IVF_NPROBE, index.nlist)
+    elif index_type == "hnsw":
+        _unwrap(index).hnsw.efSearch = settings.RAG_HNSW_EF_SEARCH
+
+
+def search_params(index, allowed_ids):
+    """
+    SearchParameters restricting a search to allowed_ids with an ID
+    selector, carrying over the index's nprobe / efSearch. IVF probes more
+    lists the more selective the filter, so about as many allowed vectors
+    are scanned as an unfiltered search would scan in total.
+    """
+    selector = faiss.IDSelectorBatch(np.asarray(allowed_ids, dtype=np.int64))
+    index_type = describe_index(index)
+
+    if index_type == "ivf":
+        selected = max(1, len(allowed_ids))
+        nprobe = min(index.nlist, math.ceil(index.nprobe * max(1, index.ntotal) / selected))
+        return faiss.SearchParametersIVF(sel=selector, nprobe=max(index.nprobe, nprobe))
+    if index_type == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=_unwrap(index).hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def reconstruct_vectors(index, ids):
+    """Return the stored vectors for ids as an (n, dim) float32 matrix"""
+    if not ids:
+        return np.zeros((0, index.d), dtype=np.float32)
+    return np.asarray(index.reconstruct_batch(np.array(ids, dtype=np.int64)), dtype=np.float32)
+
+
+def rerank_exact(query_vecs, candidate_ids, lookup, top_k):
+    """
+    Re-score candidate ids with exact float32 L2 distances and keep top_k.
+    lookup(ids) returns the exact vectors of ids. Returns (D, I) shaped like
+    an index search, padded with inf / -1.
+    """
+    D = np.full((len(query_vecs), top_k), np.inf, dtype=np.float32)
+    I = np.full((len(query_vecs), top_k), -1, dtype=np.int64)
+
+    for row, (query_vec, ids) in enumerate(zip(query_vecs, candidate_ids)):
+        ids = ids[ids >= 0]
+        if not len(ids):
+            continue
+        diffs = np.asarray(lookup(ids), dtype=np.float32) - query_vec
+        distances = np.einsum("ij,ij->i", diffs, diffs)
+        order = np.argsort(distances, kind="stable")[:top_k]
+        D[row, :len(order)] = distances[order]
+        I[row, :len(order)] = ids[order]
+
+    return D, I
+
+
+def estimate_index_bytes(index):
+    """Approximate resident size of an index's vectors and ids"""
+    if index is None:
+        return 0
+    storage = describe_storage(index)
+    if storage == "int8":
+        bytes_per_vector = index.d + 8
+    elif storage == "pq":
+        bytes_per_vector = pq_subquantizers(index.d) * settings.RAG_PQ_NBITS // 8 + 8
+    else:
+        bytes_per_vector = index.d * 4 + 8
+    if describe_index(index) == "hnsw":
+        bytes_per_vector += settings.RAG_HNSW_M * 2 * 4
+    return index.ntotal * bytes_per_vector
+
+
+def get_index_params(index):
+    """Describe the live index type and its search parameters"""
+    index_type = describe_index(index)
+    params = {"index_type": index_type, "storage": describe_storage(index)}
+
+    if index_type == "ivf":
+        params["nlist"] = index.nlist
+        params["nprobe"] = index.nprobe
+    elif index_type == "hnsw":
+        hnsw = _unwrap(index).hnsw
+        params["hnsw_m"] = settings.RAG_HNSW_M
+        params["ef_search"] = hnsw.efSearch
+        params["ef_construction"] = hnsw.efConstruction
+
+    return params
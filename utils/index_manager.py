@@ -0,0 +1,211 @@
+import os
+import re
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from config.config import settings
+from utils.build_jobs import FAILED, BuildJobRunner
+from utils.chunking import split_into_chunks
+from utils.lexical import build_lexical_index
+from utils.rag import VectorStore
+
+NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def namespace_dir(base_dir, namespace):
+    """Directory for a namespace; unsafe names are hashed instead of escaped"""
+    if not NAMESPACE_PATTERN.match(namespace):
+        namespace = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(base_dir, namespace)
+
+
+class RawTextSearch:
+    """
+    BM25 over fixed word windows of a document's raw text.
+    Needs no embedding model, so it can answer queries the moment a resume
+    is uploaded, while its index is still being built.
+    """
+
+    def __init__(self, text, passage_words=None):
+        self.passages = split_into_chunks(text, passage_words or settings.RAG_FALLBACK_PASSAGE_WORDS)
+        self.index = build_lexical_index(enumerate(self.passages))
+
+    def search(self, query, top_k):
+        """[(passage, score)] best first; the opening passages if no term matches"""
+        scores, ids = self.index.search(query, top_k)
+        if not len(ids):
+            return [(passage, None) for passage in self.passages[:top_k]]
+        return [(self.passages[i], float(score)) for score, i in zip(scores, ids)]
+
+
+class IndexManager:
+    """
+    Many small vector stores keyed by session or resume id.
+
+    Each namespace has its own knowledge base and index under base_dir, so
+    concurrent users never overwrite each other's files. Loaded indexes are
+    kept in LRU order; when their combined size passes max_memory_bytes the
+    least recently used ones are unloaded. Every index is already persisted
+    by build(), so an evicted namespace is simply reloaded on its next use.
+
+    build_async() builds in the background and returns a BuildJob handle;
+    until that build succeeds, queries on the namespace are answered by a
+    lexical search of the raw text it was given.
+    """
+
+    def __init__(self, base_dir=None, max_memory_bytes=None):
+        self.base_dir = base_dir or settings.RAG_NAMESPACE_DIR
+        if max_memory_bytes is None:
+            max_memory_bytes = settings.RAG_INDEX_MEMORY_MB * 1024 * 1024
+        self.max_memory_bytes = max_memory_bytes
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+        self._jobs = BuildJobRunner()
+        self._fallbacks = {}
+        self.evictions = 0
+
+    def get(self, namespace):
+        """Return the store for a namespace, creating its directories if needed"""
+        with self._lock:
+            store = self._stores.get(namespace)
+            if store is None:
+                store = VectorStore(namespace_dir(self.base_dir, namespace))
+                os.makedirs(store.kb_path, exist_ok=True)
+                self._stores[namespace] = store
+            self._stores.move_to_end(namespace)
+            return store
+
+    def build(self, namespace, force=False, progress=None):
+        """Build a namespace's index, then evict others if over the memory cap"""
+        result = self.get(namespace).build(force, progress)
+        self.evict()
+        return result
+
+    def build_async(self, namespace, force=False, text=None):
+        """
+        Start building a namespace's index in the background and return the
+        BuildJob. text, the raw document text, is searched lexically by
+        query() until the build succeeds.
+        """
+        fallback = RawTextSearch(text) if text else None
+
+        def build(progress):
+            result = self.build(namespace, force, progress)
+            if result:
+                # The index answers from now on; free the raw text unless a newer build replaced it
+                with self._lock:
+                    if self._fallbacks.get(namespace) is fallback:
+                        del self._fallbacks[namespace]
+            return result
+
+        with self._lock:
+            if fallback is not None:
+                self._fallbacks[namespace] = fallback
+            else:
+                self._fallbacks.pop(namespace, None)
+            return self._jobs.submit(namespace, build)
+
+    def ensure_built(self, namespace, text=None):
+        """
+        build_async() unless the namespace's latest build is still pending or
+        succeeded; returns the BuildJob either way. A namespace built by an
+        earlier process gets a new build, which finds nothing to re-embed.
+        """
+        job = self._jobs.get(namespace)
+        if job is not None and job.status != FAILED:
+            return job
+        return self.build_async(namespace, text=text)
+
+    def job(self, namespace):
+        """The latest background build of a namespace, or None"""
+        return self._jobs.get(namespace)
+
+    def _fallback(self, namespace):
+        """The raw-text search to use while the namespace's index is not ready"""
+        with self._lock:
+            fallback = self._fallbacks.get(namespace)
+            if fallback is None:
+                return None
+            job = self._jobs.get(namespace)
+            if job is None or job.ready:
+                del self._fallbacks[namespace]
+                return None
+            return fallback
+
+    def query(self, namespace, query, top_k=3, filter=None, with_metadata=False, diversify=False):
+        """
+        Query a namespace's index, loading it from disk if it was evicted.
+        While a background build is pending, passages of the raw text are
+        returned instead; filter and diversify do not apply to them.
+        """
+        fallback = self._fallback(namespace)
+        if fallback is not None:
+            passages = [passage for passage, _ in fallback.search(query, top_k)]
+            if with_metadata:
+                return [{"chunk": passage, "metadata": None} for passage in passages]
+            return passages
+
+        results = self.get(namespace).query(query, top_k, filter, with_metadata, diversify)
+        self.evict()
+        return results
+
+    def query_batch(self, namespace, queries, top_k=3, filter=None, diversify=False):
+        fallback = self._fallback(namespace)
+        if fallback is not None:
+            return [
+                [
+                    {"chunk": passage, "score": score, "distance": None, "metadata": None}
+                    for passage, score in fallback.search(query, top_k)
+                ]
+                for query in queries
+            ]
+
+        results = self.get(namespace).query_batch(queries, top_k, filter, diversify)
+        self.evict()
+        return results
+
+    def memory_bytes(self):
+        with self._lock:
+            return sum(store.memory_bytes() for store in self._stores.values())
+
+    def evict(self):
+        """Unload least recently used indexes until under the memory cap"""
+        with self._lock:
+            total = sum(store.memory_bytes() for store in self._stores.values())
+            # Never unload the most recently used namespace
+            for namespace in list(self._stores)[:-1]:
+                if total <= self.max_memory_bytes:
+                    break
+                store = self._stores[namespace]
+                if not store.is_loaded():
+                    continue
+                total -= store.memory_bytes()
+                store.unload()
+                self.evictions += 1
+                print(f"💤 Evicted index for namespace {namespace}")
+
+    def drop(self, namespace):
+        """Forget a namespace and delete its files"""
+        with self._lock:
+            store = self._stores.pop(namespace, None)
+            if store is not None:
+                store.unload()
+            self._fallbacks.pop(namespace, None)
+            shutil.rmtree(namespace_dir(self.base_dir, namespace), ignore_errors=True)
+        self._jobs.forget(namespace)
+
+    def stats(self):
+        with self._lock:
+            loaded = [ns for ns, store in self._stores.items() if store.is_loaded()]
+            return {
+                "namespaces": len(self._stores),
+                "loaded": len(loaded),
+                "memory_bytes": sum(store.memory_bytes() for store in self._stores.values()),
+                "max_memory_bytes": self.max_memory_bytes,
+                "evictions": self.evictions,
+                "building": self._jobs.running(),
+            }
+
+
+index_manager = IndexManager()
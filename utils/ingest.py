@@ -0,0 +1,328 @@
+import os
+import glob
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from pypdf import PdfReader
+
+
+def load_pages_from_file(file_path):
+    """Extract the text of each page of a .pdf, or the whole text of a .txt"""
+    try:
+        ext = os.path.splitext(file_path)[1].lower()
+
+        if ext == ".txt":
+            with open(file_path, "r", encoding="utf-8") as f:
+                return [f.read()]
+
+        elif ext == ".pdf":
+            reader = PdfReader(file_path)
+            pages = []
+            for page in reader.pages:
+                pages.append(page.extract_text() or "")
+            return pages
+
+        return []
+    except Exception as e:
+        print(f"❌ Error reading {file_path}: {e}")
+        return []
+
+
+def load_document(file_path):
+    """
+    Extract a file's text and the character offset at which each page
+    starts. Plain text files have no pages.
+    """
+    pages = load_pages_from_file(file_path)
+    if os.path.splitext(file_path)[1].lower() != ".pdf":
+        return "".join(pages), []
+
+    page_starts = []
+    position = 0
+    for page in pages:
+        page_starts.append(position)
+        position += len(page) + 1
+    return "\n".join(pages) + "\n" if pages else "", page_starts
+
+
+def load_text_from_file(file_path):
+    """Extract text from .txt or .pdf files"""
+    return load_document(file_path)[0]
+
+
+class StageStats:
+    """Items processed and busy seconds for each ingestion stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, items, seconds):
+        entry = self.stages.setdefault(stage, {"items": 0, "seconds": 0.0})
+        entry["items"] += items
+        entry["seconds"] += seconds
+
+    def report(self):
+        return {
+            stage: {
+                "items": entry["items"],
+                "seconds": round(entry["seconds"], 4),
+                "per_second": round(entry["items"] / entry["seconds"], 1) if entry["seconds"] else None,
+            }
+            for stage, entry in self.stages.items()
+        }
+
+    def log(self):
+        for stage, entry in self.report().items():
+            rate = f"{entry['per_second']}/s" if entry["per_second"] is not None else "n/a"
+            print(f"   ⏱️ {stage}: {entry['items']} in {entry['seconds']:.2f}s ({rate})")
+
+
+def discover_files(kb_path, stats=None):
+    """List the knowledge base files in a stable order"""
+    start = time.perf_counter()
+    files = sorted(path for path in glob.glob(os.path.join(kb_path, "*")) if os.path.isfile(path))
+    if stats is not None:
+        stats.add("discover", len(files), time.perf_counter() - start)
+    return files
+
+
+def extract_texts(files, workers=None, max_pending=None, stats=None):
+    """
+    Yield (file, text, page_starts) tuples in input order.
+    Extraction runs in a process pool with at most max_pending files in
+    flight, so only a bounded number of documents are held in memory.
+    """
+    files = list(files)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(files))
+    max_pending = max_pending or workers * 2
+    start = time.perf_counter()
+
+    try:
+        if workers <= 1:
+            for file in files:
+                yield (file, *load_document(file))
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for file in files:
+                pending.append((file, pool.submit(load_document, file)))
+                if len(pending) >= max_pending:
+                    done_file, future = pending.popleft()
+                    yield (done_file, *future.result())
+            while pending:
+                done_file, future = pending.popleft()
+                yield (done_file, *future.result())
+    finally:
+        if stats is not None:
+            stats.add("extract", len(files), time.perf_counter() - start)
+
+
+# Rough peak activation memory per padded token while a MiniLM-sized
+# encoder runs (one layer's FFN and attention rows live at a time)
+ENCODE_BYTES_PER_TOKEN = 20 * 1024
+ENCODE_TOKENS_PER_CORE = 4096
+# Never below a batch of 32 full-length chunks, the old fixed batch size
+MIN_ENCODE_TOKEN_BUDGET = 32 * 256
+MAX_ENCODE_BATCH_SIZE = 512
+MEMINFO_FILE = "/proc/meminfo"
+
+
+def available_memory_bytes():
+    """
+    Memory available to new allocations without swapping, or None where the
+    platform does not report it. On Linux this is MemAvailable, which counts
+    reclaimable page cache; free pages alone are the fallback elsewhere.
+    """
+    try:
+        with open(MEMINFO_FILE, "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def encode_token_budget(workers=1):
+    """
+    Padded tokens per encode batch when no fixed batch size is set: grows
+    with the CPU cores, capped so the batches of all workers together use
+    at most a quarter of the available memory.
+    """
+    budget = ENCODE_TOKENS_PER_CORE * (os.cpu_count() or 1)
+    available = available_memory_bytes()
+    if available:
+        budget = min(budget, available // 4 // max(1, workers) // ENCODE_BYTES_PER_TOKEN)
+    return max(budget, MIN_ENCODE_TOKEN_BUDGET)
+
+
+class BatchEncoder:
+    """
+    Encode chunks in length-sorted batches on background threads.
+
+    add() buffers chunks; every sort_window chunks the buffer is sorted by
+    token count and cut into batches, so each batch pads to a similar
+    length. A batch holds batch_size chunks or, with batch_size=0, as many
+    as fit in token_budget padded tokens. Batches reach the encode workers
+    through a bounded queue, blocking when encoding falls behind, so
+    extraction and encoding overlap without unbounded buffering. finish()
+    returns the vectors in the order the chunks were added.
+    progress, if given, is called with the number of chunks encoded so far
+    after every batch.
+    """
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        encode,
+        batch_size=64,
+        max_queued_batches=4,
+        stats=None,
+        progress=None,
+        token_budget=None,
+        workers=1,
+        sort_window=1024,
+    ):
+        self.encode = encode
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.token_budget = token_budget or encode_token_budget(self.workers)
+        self.sort_window = max(1, sort_window)
+        self.stats = stats
+        self.progress = progress
+        self._queue = queue.Queue(maxsize=max_queued_batches)
+        self._pending = []
+        self._added = 0
+        self._lock = threading.Lock()
+        self._orders = []
+        self._ids = []
+        self._vectors = []
+        self._encoded = 0
+        self._counts = {"batches": 0, "tokens": 0, "padded_tokens": 0}
+        self._started = None
+        self._finished = None
+        self._error = None
+        self._threads = [
+            threading.Thread(target=self._run, name=f"rag-encoder-{worker}", daemon=True)
+            for worker in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if self._error is not None:
+                continue
+
+            orders, ids, texts, tokens = item
+            try:
+                start = time.perf_counter()
+                with self._lock:
+                    if self._started is None:
+                        self._started = start
+                vectors = np.asarray(self.encode(texts), dtype=np.float32)
+                with self._lock:
+                    if self.stats is not None:
+                        self.stats.add("encode", len(texts), time.perf_counter() - start)
+                    self._orders.extend(orders)
+                    self._ids.extend(ids)
+                    self._vectors.append(vectors)
+                    self._encoded += len(texts)
+                    self._counts["batches"] += 1
+                    self._counts["tokens"] += sum(tokens)
+                    self._counts["padded_tokens"] += len(tokens) * max(tokens)
+                    encoded = self._encoded
+                if self.progress is not None:
+                    self.progress(encoded)
+            except Exception as e:
+                self._error = e
+
+    def add(self, chunk_id, text, num_tokens=None):
+        """Queue a chunk; num_tokens defaults to its whitespace word count"""
+        if num_tokens is None:
+            num_tokens = len(text.split())
+        self._pending.append((max(1, num_tokens), self._added, chunk_id, text))
+        self._added += 1
+        if len(self._pending) >= self.sort_window:
+            self._flush()
+
+    def _batches(self, items):
+        """Cut length-sorted items into batches of batch_size or token_budget"""
+        if self.batch_size:
+            for start in range(0, len(items), self.batch_size):
+                yield items[start:start + self.batch_size]
+            return
+
+        batch = []
+        for item in items:
+            # Sorted ascending, so the new item is the longest in the batch
+            if batch and (
+                (len(batch) + 1) * item[0] > self.token_budget or len(batch) >= MAX_ENCODE_BATCH_SIZE
+            ):
+                yield batch
+                batch = []
+            batch.append(item)
+        if batch:
+            yield batch
+
+    def _flush(self):
+        if not self._pending:
+            return
+        self._pending.sort(key=lambda item: item[0])
+        for batch in self._batches(self._pending):
+            tokens, orders, ids, texts = (list(column) for column in zip(*batch))
+            self._queue.put((orders, ids, texts, tokens))
+        self._pending = []
+
+    def finish(self):
+        """Encode what is left and return (ids, (n, dim) float32 vectors) in add() order"""
+        self._flush()
+        for _ in self._threads:
+            self._queue.put(self._DONE)
+        for thread in self._threads:
+            thread.join()
+        self._finished = time.perf_counter()
+        if self._error is not None:
+            raise self._error
+        if not self._vectors:
+            return [], None
+
+        order = np.argsort(np.array(self._orders, dtype=np.int64), kind="stable")
+        ids = [self._ids[row] for row in order]
+        return ids, np.vstack(self._vectors)[order]
+
+    def throughput(self):
+        """Counts and wall-clock rates of the finished encode, for tuning per host"""
+        seconds = (self._finished - self._started) if self._started and self._finished else 0.0
+        counts = self._counts
+        return {
+            "chunks": self._encoded,
+            **counts,
+            "workers": self.workers,
+            "batch_size": self.batch_size or None,
+            "token_budget": None if self.batch_size else self.token_budget,
+            "seconds": round(seconds, 4),
+            "chunks_per_second": round(self._encoded / seconds, 1) if seconds else None,
+            "tokens_per_second": round(counts["tokens"] / seconds, 1) if seconds else None,
+            # Share of the padded batch positions holding real tokens
+            "padding_efficiency": round(counts["tokens"] / counts["padded_tokens"], 3) if counts["padded_tokens"] else None,
+        }
+
+    def close(self):
+        """Stop the encoder threads without waiting for results"""
+        self._error = self._error or RuntimeError("encoder closed")
+        for thread in self._threads:
+            if thread.is_alive():
+                self._queue.put(self._DONE)
@@ -0,0 +1,214 @@
+import os
+import re
+import math
+from collections import Counter
+import numpy as np
+
+LEXICAL_FILE = "lexical.npz"
+
+# Keeps exact resume tokens whole: "ci/cd", "c++", "c#", "node.js", "sox"
+TERM_PATTERN = re.compile(r"[a-z0-9+#]+(?:[./&-][a-z0-9+#]+)*")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    """Lowercased lexical terms of text"""
+    return TERM_PATTERN.findall(text.lower())
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over chunk texts, addressed by FAISS id.
+
+    Postings are stored CSR-style: the postings of terms[i] are
+    doc_ids[offsets[i]:offsets[i + 1]] with term frequencies tfs[...].
+    Document lengths are kept as (ids, lengths) sorted by id.
+    """
+
+    def __init__(self, terms, offsets, doc_ids, tfs, ids, lengths):
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.ids = ids
+        self.lengths = lengths
+        self._rows = {term: row for row, term in enumerate(terms)}
+        self._avg_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        arrays = (self.offsets, self.doc_ids, self.tfs, self.ids, self.lengths)
+        # Rough cost of the term -> row dict on top of the arrays
+        return sum(a.nbytes for a in arrays) + len(self.terms) * 100
+
+    def __contains__(self, term):
+        return term in self._rows
+
+    def postings(self, term):
+        """(doc_ids, tfs) for term, empty if the term is unknown"""
+        row = self._rows.get(term)
+        if row is None:
+            return self.doc_ids[:0], self.tfs[:0]
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    def search(self, query, top_k, allowed=None):
+        """
+        Return (scores, ids) of the top_k chunks by BM25, best first,
+        optionally restricted to the chunk ids in allowed.
+        """
+        doc_count = len(self.ids)
+        scores = np.zeros(doc_count, dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            doc_ids, tfs = self.postings(term)
+            if not len(doc_ids):
+                continue
+            idf = math.log(1 + (doc_count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            rows = np.searchsorted(self.ids, doc_ids)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[rows] / self._avg_length)
+            scores[rows] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+
+        if allowed is not None:
+            scores[~np.isin(self.ids, allowed)] = 0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return scores[matched], self.ids[matched]
+
+    def save(self, path=LEXICAL_FILE):
+        """Write the index to path via a temp file and fsync it"""
+        tmp_path = path + ".tmp.npz"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                # Terms never contain whitespace, so one joined blob is enough
+                terms=np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8),
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                tfs=self.tfs,
+                ids=self.ids,
+                lengths=self.lengths,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=LEXICAL_FILE):
+        with np.load(path) as data:
+            blob = data["terms"].tobytes().decode("utf-8")
+            return cls(
+                blob.split("\n") if blob else [],
+                data["offsets"],
+                data["doc_ids"],
+                data["tfs"],
+                data["ids"],
+                data["lengths"],
+            )
+
+
+class LexicalIndexBuilder:
+    """
+    Collect chunks for a new LexicalIndex.
+    New chunks are tokenized with add(); postings of chunks kept from a
+    previous index are copied without re-tokenizing via extend().
+    """
+
+    def __init__(self):
+        self._docs = []
+        self._kept = None
+
+    def add(self, chunk_id, text):
+        self._docs.append((chunk_id, Counter(tokenize(text))))
+
+    def extend(self, index, chunk_ids):
+        """Keep the postings of chunk_ids from an existing index"""
+        self._kept = (index, np.asarray(chunk_ids, dtype=np.int64))
+
+    def build(self):
+        pairs = [(term, chunk_id, tf) for chunk_id, counts in self._docs for term, tf in counts.items()]
+        old_terms = []
+
+        if self._kept is not None:
+            index, kept_ids = self._kept
+            old_rows = np.repeat(np.arange(len(index.terms)), np.diff(index.offsets))
+            keep = np.isin(index.doc_ids, kept_ids)
+            keep_docs = np.isin(index.ids, kept_ids)
+            # Terms whose postings all belonged to removed chunks are dropped
+            used_rows = np.unique(old_rows[keep])
+            old_terms = [index.terms[row] for row in used_rows]
+
+        terms = sorted({term for term, _, _ in pairs}.union(old_terms))
+        positions = {term: row for row, term in enumerate(terms)}
+
+        term_rows = [np.array([positions[term] for term, _, _ in pairs], dtype=np.int64)]
+        doc_ids = [np.array([chunk_id for _, chunk_id, _ in pairs], dtype=np.int64)]
+        tfs = [np.array([tf for _, _, tf in pairs], dtype=np.int32)]
+        ids = [np.array([chunk_id for chunk_id, _ in self._docs], dtype=np.int64)]
+        lengths = [np.array([sum(counts.values()) for _, counts in self._docs], dtype=np.int32)]
+
+        if self._kept is not None:
+            remap = np.zeros(len(index.terms), dtype=np.int64)
+            remap[used_rows] = [positions[term] for term in old_terms]
+            term_rows.append(remap[old_rows[keep]])
+            doc_ids.append(index.doc_ids[keep])
+            tfs.append(index.tfs[keep])
+            ids.append(index.ids[keep_docs])
+            lengths.append(index.lengths[keep_docs])
+
+        term_rows = np.concatenate(term_rows)
+        doc_ids = np.concatenate(doc_ids)
+        tfs = np.concatenate(tfs)
+        ids = np.concatenate(ids)
+        lengths = np.concatenate(lengths)
+
+        order = np.lexsort((doc_ids, term_rows))
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(term_rows, minlength=len(terms)))]).astype(np.int64)
+        by_id = np.argsort(ids, kind="stable")
+
+        return LexicalIndex(terms, offsets, doc_ids[order], tfs[order], ids[by_id], lengths[by_id])
+
+
+def build_lexical_index(items):
+    """Build a LexicalIndex from (id, text) pairs"""
+    builder = LexicalIndexBuilder()
+    for chunk_id, text in items:
+        builder.add(chunk_id, text)
+    return builder.build()
+
+
+def open_lexical_index(path=LEXICAL_FILE):
+    """Load a saved LexicalIndex, or None if missing"""
+    if not os.path.exists(path):
+        return None
+    return LexicalIndex.load(path)
+
+
+def is_keyword_query(query, index, max_terms):
+    """
+    Whether query is a short keyword lookup the lexical index can answer
+    alone: at most max_terms terms, all of them present in the index.
+    """
+    terms = tokenize(query)
+    return 0 < len(terms) <= max_terms and all(term in index for term in terms)
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse ranked id lists with RRF: score(id) = sum of 1 / (k + rank).
+    Returns [(id, score)] best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            if chunk_id >= 0:
+                scores[int(chunk_id)] = scores.get(int(chunk_id), 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
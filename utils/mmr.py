@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def maximal_marginal_relevance(query_vec, candidate_vecs, top_k, lambda_mult=0.5):
+    """
+    Pick top_k candidates by Maximal Marginal Relevance.
+
+    Each step selects the candidate maximizing
+    lambda_mult * sim(query, c) - (1 - lambda_mult) * max sim(c, selected),
+    using cosine similarity. Similarities are computed as one matrix
+    product up front; each step is a vectorized argmax and a running max.
+    Returns candidate row positions in selection order.
+    """
+    candidates = _normalize(np.asarray(candidate_vecs, dtype=np.float32))
+    query = _normalize(np.asarray(query_vec, dtype=np.float32).reshape(-1))
+    top_k = min(top_k, len(candidates))
+    if top_k <= 0:
+        return []
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected = []
+
+    for _ in range(top_k):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, similarity[pick])
+
+    return selected
@@ -1,183 +1,1034 @@
 import os
-import glob
-import pickle
-from pypdf import PdfReader
-from sentence_transformers import SentenceTransformer
+import json
+import time
+import bisect
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
 import numpy as np
 import faiss
+from config.config import settings
+from models.embeddings import (
+    get_embedding_model,
+    get_embedding_model_id,
+    get_embedding_tokenizer,
+    get_max_seq_length,
+    get_model_load_time,
+    is_embedding_model_loaded,
+)
+from utils.atomic_io import atomic_write_json, fsync_dir, fsync_file
+from utils.chunk_store import (
+    CHUNKS_FILE,
+    ChunkMetadata,
+    LEGACY_CHUNKS_FILE,
+    OFFSETS_FILE,
+    VECTORS_FILE,
+    ChunkStoreWriter,
+    open_chunk_store,
+    open_vectors,
+    write_vectors,
+)
+from utils.chunking import CHUNKER_VERSION, find_headings, split_into_chunks, split_into_token_chunks
+from utils.dedup import NearDuplicateIndex, simhash
+from utils.embedding_cache import encode_with_cache, get_embedding_cache
+from utils.index_factory import (
+    TRAINED_INDEX_FILE,
+    apply_search_params,
+    choose_index_type,
+    choose_storage,
+    create_index,
+    describe_index,
+    describe_storage,
+    estimate_index_bytes,
+    get_index_params,
+    has_stable_ids,
+    needs_retraining,
+    reconstruct_vectors,
+    rerank_exact,
+    search_params,
+    supports_id_selector,
+    supports_removal,
+)
+from utils.lexical import (
+    LEXICAL_FILE,
+    LexicalIndexBuilder,
+    build_lexical_index,
+    is_keyword_query,
+    open_lexical_index,
+    reciprocal_rank_fusion,
+)
+from utils.mmr import maximal_marginal_relevance
+from utils.ingest import (
+    BatchEncoder,
+    StageStats,
+    discover_files,
+    extract_texts,
+    load_text_from_file,
+)
 
 KB_PATH = "knowledge_base"
 INDEX_FILE = "vector_index.faiss"
-CHUNKS_FILE = "chunks.pkl"
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+MANIFEST_FILE = "index_manifest.json"
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+MANIFEST_VERSION = 3
+QUERY_CACHE_SIZE = 256
+# Filtered HNSW and IVF searches over at most this many chunks scan them exactly
+FILTER_EXACT_SCAN_MAX = 4096
 
-# globals
-vector_index = None
-chunks = []
+# LRU cache of query vectors keyed by (model name, normalized query)
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+_query_cache_stats = {"hits": 0, "misses": 0}
 
 
-def load_text_from_file(file_path):
-    """Extract text from .txt or .pdf files"""
-    try:
-        ext = os.path.splitext(file_path)[1].lower()
+def chunk_text(text):
+    """
+    Split text into token-bounded, overlapping chunks for the embedding model.
+    Windows never exceed the model's sequence length, so no text is
+    silently truncated at encode time.
+    """
+    max_tokens = settings.RAG_CHUNK_TOKENS
+    max_seq_length = get_max_seq_length()
+    if max_seq_length:
+        # Leave room for the [CLS] and [SEP] tokens
+        max_tokens = min(max_tokens, max_seq_length - 2)
 
-        if ext == ".txt":
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
+    return split_into_token_chunks(
+        text,
+        max_tokens=max_tokens,
+        overlap=min(settings.RAG_CHUNK_OVERLAP, max_tokens // 2),
+        tokenizer=get_embedding_tokenizer(),
+    )
 
-        elif ext == ".pdf":
-            text = ""
-            reader = PdfReader(file_path)
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text + "\n"
-            return text
 
-        return ""
-    except Exception as e:
-        print(f"❌ Error reading {file_path}: {e}")
-        return ""
+def chunker_config():
+    """Chunking settings recorded in the manifest; a change forces a rebuild"""
+    return {
+        "max_tokens": settings.RAG_CHUNK_TOKENS,
+        "overlap": settings.RAG_CHUNK_OVERLAP,
+        "version": CHUNKER_VERSION,
+    }
 
 
-def split_into_chunks(text, max_length=300):
-    """Split text into chunks of approximately max_length words"""
-    words = text.split()
-    result = []
-    current = []
+def hash_file(file_path):
+    """Return the sha256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    for w in words:
-        current.append(w)
-        if len(current) >= max_length:
-            result.append(" ".join(current))
-            current = []
 
-    if current:
-        result.append(" ".join(current))
+def hash_text(text):
+    """Return the sha256 hex digest of a chunk of text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-    return result
 
+def new_manifest():
+    """Empty manifest describing an index with no files"""
+    return {
+        "version": MANIFEST_VERSION,
+        "model": get_embedding_model_id(),
+        "chunker": chunker_config(),
+        "next_id": 0,
+        "files": {},
+    }
 
-def build_embeddings():
-    """Build vector embeddings from all files in knowledge base"""
-    global vector_index, chunks
 
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """Load the per-file / per-chunk hash manifest, or None if missing or stale"""
     try:
-        # Get all files from knowledge base
-        files = glob.glob(os.path.join(KB_PATH, "*"))
-        if not files:
-            print("⚠️ No files found in KB.")
-            return False
+        if not os.path.exists(manifest_file):
+            return None
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (
+            manifest.get("version") != MANIFEST_VERSION
+            or manifest.get("model") != get_embedding_model_id()
+            or manifest.get("chunker") != chunker_config()
+        ):
+            return None
+        return manifest
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable manifest: {e}")
+        return None
+
+
+def save_manifest(manifest, manifest_file=MANIFEST_FILE):
+    """Persist the manifest next to the index"""
+    atomic_write_json(manifest_file, manifest)
+
+
+def normalize_query(query):
+    """Normalize query text so trivially different queries share a cache entry"""
+    return " ".join(query.lower().split())
+
+
+def embed_queries(queries):
+    """
+    Return an (n, dim) float32 matrix of query embeddings.
+    Cached queries are served from the LRU; all misses are encoded in one call.
+    """
+    model_id = get_embedding_model_id()
+    keys = [(model_id, normalize_query(q)) for q in queries]
+    vectors = [None] * len(keys)
+    missing = {}
+
+    with _query_cache_lock:
+        for i, key in enumerate(keys):
+            query_vec = _query_cache.get(key)
+            if query_vec is not None:
+                _query_cache.move_to_end(key)
+                _query_cache_stats["hits"] += 1
+                vectors[i] = query_vec
+            else:
+                _query_cache_stats["misses"] += 1
+                missing.setdefault(key, []).append(i)
+
+    if missing:
+        texts = [key[1] for key in missing]
+        encoded = np.array(get_embedding_model().encode(texts), dtype=np.float32)
+
+        with _query_cache_lock:
+            for (key, positions), row in zip(missing.items(), encoded):
+                query_vec = row.reshape(1, -1)
+                query_vec.setflags(write=False)
+                for i in positions:
+                    vectors[i] = query_vec
+                _query_cache[key] = query_vec
+                _query_cache.move_to_end(key)
+            while len(_query_cache) > QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+
+    return np.vstack(vectors)
+
+
+def embed_query(query):
+    """Return the (1, dim) float32 embedding of a query, using the LRU cache"""
+    return embed_queries([query])
+
+
+def get_query_cache_stats():
+    """Hit/miss counters and current size of the query embedding cache"""
+    with _query_cache_lock:
+        hits = _query_cache_stats["hits"]
+        misses = _query_cache_stats["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "size": len(_query_cache),
+            "max_size": QUERY_CACHE_SIZE,
+        }
+
+
+def clear_query_cache():
+    """Drop all cached query embeddings and reset the counters"""
+    with _query_cache_lock:
+        _query_cache.clear()
+        _query_cache_stats["hits"] = 0
+        _query_cache_stats["misses"] = 0
+
+
+class IndexSnapshot(NamedTuple):
+    """
+    An index and the chunk texts and manifest published with it.
+    Quantized indexes also carry the exact float32 vectors (memory-mapped,
+    rows in chunk id order) used to re-rank their candidates; lexical is
+    the BM25 inverted index over the same chunks.
+    """
+    index: object
+    chunks: object
+    version: int
+    manifest: Optional[dict]
+    vectors: Optional[np.ndarray] = None
+    lexical: Optional[object] = None
+
+
+class VectorStore:
+    """
+    A knowledge base directory and the FAISS index built from it.
+
+    All files live under root: the documents in knowledge_base/ and one
+    directory per build generation (gen-NNNNNN) holding the index, chunk
+    store and manifest. A build writes and fsyncs a new generation, then
+    atomically repoints root/CURRENT at it, so a crash never leaves a torn
+    index/chunks pair on disk. Readers work on an immutable IndexSnapshot
+    and never wait for a build in progress.
+
+    The default store uses the working directory; IndexManager gives each
+    session its own root.
+    """
+
+    def __init__(self, root="."):
+        self.root = root
+        self.kb_path = os.path.join(root, KB_PATH)
+        self.current_file = os.path.join(root, CURRENT_FILE)
+        self.trained_index_file = os.path.join(root, TRAINED_INDEX_FILE)
+        self._snapshot = None
+        self._swap_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    @property
+    def vector_index(self):
+        snapshot = self._snapshot
+        return snapshot.index if snapshot else None
+
+    @property
+    def chunks(self):
+        snapshot = self._snapshot
+        return snapshot.chunks if snapshot else {}
+
+    def snapshot(self):
+        """Return the published snapshot, loading it from disk if needed"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.load()
+            snapshot = self._snapshot
+        return snapshot
+
+    def _publish(self, snapshot):
+        with self._swap_lock:
+            # A slow load must not replace a newer build
+            if self._snapshot is None or snapshot.version >= self._snapshot.version:
+                self._snapshot = snapshot
 
-        all_chunks = []
+    def is_loaded(self):
+        return self._snapshot is not None
 
-        # Process each file
-        for file in files:
-            print(f"📄 Processing: {file}")
-            text = load_text_from_file(file)
-            
-            if not text.strip():
-                print(f"⚠️ No text extracted from {file}")
+    def memory_bytes(self):
+        """Approximate heap held by the loaded index (chunk text and exact vectors are mmapped)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return 0
+        lexical_bytes = snapshot.lexical.nbytes if snapshot.lexical is not None else 0
+        return estimate_index_bytes(snapshot.index) + len(snapshot.chunks) * 24 + lexical_bytes
+
+    def unload(self):
+        """Release the in-memory index; it is reloaded from disk on next use"""
+        with self._swap_lock:
+            self._snapshot = None
+
+    def _generation_dir(self, generation):
+        if generation == 0:
+            # Files written before generations existed live directly in root
+            return self.root
+        return os.path.join(self.root, f"{GENERATION_PREFIX}{generation:06d}")
+
+    def _read_current(self):
+        """Generation number root/CURRENT points at, or None"""
+        try:
+            with open(self.current_file, "r", encoding="utf-8") as f:
+                return int(json.load(f)["generation"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable {self.current_file}: {e}")
+            return None
+
+    def _claim_generation(self):
+        """Create the directory for the next generation and return both"""
+        snapshot = self._snapshot
+        generation = max(self._read_current() or 0, snapshot.version if snapshot else 0) + 1
+        os.makedirs(self.root, exist_ok=True)
+        while True:
+            gen_dir = self._generation_dir(generation)
+            try:
+                os.makedirs(gen_dir)
+                return generation, gen_dir
+            except FileExistsError:
+                generation += 1
+
+    def _remove_old_generations(self, current):
+        """Delete generations older than current; newer ones may be in progress"""
+        for name in os.listdir(self.root):
+            if not name.startswith(GENERATION_PREFIX):
                 continue
+            try:
+                generation = int(name[len(GENERATION_PREFIX):])
+            except ValueError:
+                continue
+            if generation < current:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
 
-            # Split into chunks
-            parts = split_into_chunks(text)
-            all_chunks.extend(parts)
-            print(f"   ✅ Extracted {len(parts)} chunks")
+    def build(self, force=False, progress=None):
+        """
+        Build vector embeddings from all files in knowledge base.
 
-        if not all_chunks:
-            print("⚠️ No text found in uploaded files.")
-            return False
+        Rebuilds are incremental: files whose content hash matches the manifest
+        are skipped, vectors of deleted files are removed from the index, and
+        only chunks that are new are encoded. Pass force=True to rebuild
+        everything from scratch.
 
-        print(f"\n🔄 Creating embeddings for {len(all_chunks)} chunks...")
-        
-        # Create embeddings
-        embeddings = embedding_model.encode(all_chunks, show_progress_bar=True)
-        embeddings = np.array(embeddings, dtype=np.float32)
-
-        # Build FAISS index
-        vector_index = faiss.IndexFlatL2(embeddings.shape[1])
-        vector_index.add(embeddings)
-        
-        # Save index
-        faiss.write_index(vector_index, INDEX_FILE)
-        
-        # Save chunks persistently
-        with open(CHUNKS_FILE, "wb") as f:
-            pickle.dump(all_chunks, f)
-        
-        # Update global chunks
-        chunks = all_chunks
-
-        print(f"✅ Embeddings built successfully: {len(all_chunks)} chunks indexed")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error building embeddings: {e}")
-        return False
+        Changed files stream through a pipeline: text is extracted in a process
+        pool, chunked, and encoded in fixed-size batches on a background thread,
+        with bounded queues between the stages.
 
+        progress, if given, is called as progress(stage, done, total) for
+        the "extract", "encode" and "index" stages as the build advances.
+        """
+        with self._build_lock:
+            return self._build(force, progress)
 
-def load_existing_index():
-    """Load existing vector index and chunks from disk"""
-    global vector_index, chunks
-    
-    try:
-        if os.path.exists(INDEX_FILE) and os.path.exists(CHUNKS_FILE):
-            print("📂 Loading existing index and chunks...")
-            vector_index = faiss.read_index(INDEX_FILE)
-            
-            with open(CHUNKS_FILE, "rb") as f:
-                chunks = pickle.load(f)
-            
-            print(f"✅ Loaded {len(chunks)} chunks from disk")
+    def _build(self, force, progress=None):
+        gen_dir = None
+        writer = None
+        encoder = None
+        report = progress or (lambda stage, done, total: None)
+        try:
+            stats = StageStats()
+
+            # Get all files from knowledge base
+            files = discover_files(self.kb_path, stats)
+            if not files:
+                print("⚠️ No files found in KB.")
+                return False
+
+            # Work from the published snapshot; it is never modified in place
+            snapshot = self.snapshot()
+            manifest = None if force or snapshot is None or snapshot.manifest is None else dict(snapshot.manifest)
+            incremental = (
+                manifest is not None
+                and has_stable_ids(snapshot.index)
+                and snapshot.index.ntotal == len(snapshot.chunks)
+                and snapshot.index.ntotal == len({r["id"] for e in manifest["files"].values() for r in e["chunks"]})
+            )
+            if incremental:
+                old_index, old_chunks, old_vectors = snapshot.index, snapshot.chunks, snapshot.vectors
+                old_lexical = snapshot.lexical
+            else:
+                manifest = new_manifest()
+                old_index, old_chunks, old_vectors = None, {}, None
+                old_lexical = None
+
+            old_files = manifest["files"]
+            new_files = {}
+            next_id = manifest["next_id"]
+            stale_ids = []
+            changed = []
+            placements = {}
+
+            for file in files:
+                digest = hash_file(file)
+                entry = old_files.get(file)
+                if entry and entry["sha256"] == digest:
+                    new_files[file] = entry
+                else:
+                    changed.append((file, digest, entry))
+            report("extract", 0, len(changed))
+
+            generation, gen_dir = self._claim_generation()
+            writer = ChunkStoreWriter(os.path.join(gen_dir, CHUNKS_FILE), os.path.join(gen_dir, OFFSETS_FILE))
+            lexical = LexicalIndexBuilder()
+
+            # Chunks seen before, in any index, are read from the embedding cache
+            model = get_embedding_model()
+            cache = get_embedding_cache(get_embedding_model_id(), model.dimension)
+            cache_hits = cache.stats()["hits"] if cache else 0
+            encoder = BatchEncoder(
+                lambda texts: encode_with_cache(
+                    lambda batch: model.encode(batch, batch_size=len(batch), show_progress_bar=False),
+                    texts,
+                    cache,
+                ),
+                batch_size=settings.RAG_ENCODE_BATCH_SIZE,
+                max_queued_batches=settings.RAG_INGEST_QUEUE_SIZE,
+                stats=stats,
+                progress=lambda encoded: report("encode", encoded, len(writer)),
+                token_budget=settings.RAG_ENCODE_TOKEN_BUDGET,
+                workers=settings.RAG_ENCODE_WORKERS,
+                sort_window=settings.RAG_ENCODE_SORT_WINDOW,
+            )
+
+            # Near-duplicates of indexed chunks share their id instead of being encoded
+            duplicates = None
+            saved_chunks = saved_bytes = 0
+            if settings.RAG_DEDUP_MAX_DISTANCE >= 0:
+                duplicates = NearDuplicateIndex(settings.RAG_DEDUP_MAX_DISTANCE)
+                for entry in new_files.values():
+                    for record in entry["chunks"]:
+                        if "simhash" in record:
+                            duplicates.add(record["simhash"], record["id"])
+
+            # Process each changed file as its text comes out of the pool
+            extracted = extract_texts(
+                [file for file, _, _ in changed],
+                workers=settings.RAG_INGEST_WORKERS,
+                stats=stats,
+            )
+            for done, ((file, text, page_starts), (_, digest, entry)) in enumerate(zip(extracted, changed), 1):
+                print(f"📄 Processing: {file}")
+                start = time.perf_counter()
+
+                if not text.strip():
+                    print(f"⚠️ No text extracted from {file}")
+                    parts = []
+                else:
+                    # Split into token-bounded chunks
+                    parts = chunk_text(text)
+                    print(f"   ✅ Extracted {len(parts)} chunks")
+                source = os.path.relpath(file, self.kb_path)
+                headings = find_headings(text)
+                heading_starts = [position for position, _ in headings]
+
+                # Chunks whose text is unchanged keep their id and vector
+                reusable = {}
+                for record in (entry["chunks"] if entry else []):
+                    reusable.setdefault(record["sha256"], []).append(record["id"])
+
+                records = []
+                for chunk in parts:
+                    heading = bisect.bisect_right(heading_starts, chunk.start) - 1
+                    metadata = ChunkMetadata(
+                        source,
+                        bisect.bisect_right(page_starts, chunk.start),
+                        chunk.start,
+                        chunk.end,
+                        headings[heading][1] if heading >= 0 else None,
+                    )
+                    chunk_hash = hash_text(chunk.text)
+                    fingerprint = simhash(chunk.text) if duplicates is not None else None
+                    reused = bool(reusable.get(chunk_hash))
+                    duplicate_id = None
+                    if not reused and duplicates is not None:
+                        duplicate_id = duplicates.find(fingerprint)
+
+                    if reused:
+                        # Same text, but it may have moved within the file
+                        chunk_id = reusable[chunk_hash].pop()
+                    elif duplicate_id is not None:
+                        chunk_id = duplicate_id
+                        saved_chunks += 1
+                        saved_bytes += model.dimension * 4 + len(chunk.text.encode("utf-8"))
+                    else:
+                        chunk_id = next_id
+                        next_id += 1
+                        encoder.add(chunk_id, chunk.text, chunk.num_tokens)
+                        writer.add(chunk_id, chunk.text, metadata)
+                        lexical.add(chunk_id, chunk.text)
+                    placements.setdefault(chunk_id, []).append(metadata)
+
+                    record = {"id": chunk_id, "sha256": chunk_hash}
+                    if duplicate_id is not None:
+                        # Lets the chunk point here if the file it came from is removed
+                        record["placement"] = list(metadata[1:])
+                    if fingerprint is not None:
+                        record["simhash"] = fingerprint
+                        if duplicate_id is None:
+                            duplicates.add(fingerprint, chunk_id)
+                    records.append(record)
+
+                for ids in reusable.values():
+                    stale_ids.extend(ids)
+                new_files[file] = {"sha256": digest, "chunks": records}
+                stats.add("chunk", len(parts), time.perf_counter() - start)
+                report("extract", done, len(changed))
+
+            # Files removed from the KB since the last build
+            removed = [file for file in old_files if file not in new_files]
+            for file in removed:
+                print(f"🗑️ Removing: {file}")
+                stale_ids.extend(record["id"] for record in old_files[file]["chunks"])
+
+            # A merged chunk stays while any file still references it
+            referenced = {}
+            for file, entry in new_files.items():
+                source = os.path.relpath(file, self.kb_path)
+                for record in entry["chunks"]:
+                    referenced.setdefault(record["id"], set()).add(source)
+                    if "placement" in record and record["id"] not in placements:
+                        placements[record["id"]] = [ChunkMetadata(source, *record["placement"])]
+            stale_ids = [chunk_id for chunk_id in dict.fromkeys(stale_ids) if chunk_id not in referenced]
+            if saved_chunks:
+                print(
+                    f"🧬 Merged {saved_chunks} near-duplicate chunks: saved {saved_chunks} embeddings "
+                    f"and {saved_bytes / 1024:.1f} KB of vectors and text"
+                )
+
+            num_encoded = len(writer)
+            if num_encoded:
+                print(f"\n🔄 Creating embeddings for {num_encoded} new chunks...")
+            new_ids, embeddings = encoder.finish()
+            throughput = encoder.throughput()
+            encoder = None
+            if throughput["batches"]:
+                print(
+                    f"   ⚡ Encoded {throughput['chunks']} chunks in {throughput['batches']} batches on "
+                    f"{throughput['workers']} workers: {throughput['chunks_per_second']} chunks/s, "
+                    f"{throughput['tokens_per_second']} tokens/s, "
+                    f"{throughput['padding_efficiency']:.0%} padding efficiency"
+                )
+            report("encode", num_encoded, num_encoded)
+            if cache is not None and num_encoded:
+                cache.flush()
+                print(f"   💾 {cache.stats()['hits'] - cache_hits}/{num_encoded} embeddings from cache")
+
+            if (
+                incremental
+                and not changed
+                and not removed
+                and not stale_ids
+                and describe_index(old_index) == choose_index_type(len(old_chunks))
+                and describe_storage(old_index) == choose_storage(len(old_chunks))
+            ):
+                print(f"✅ Index up to date: {len(old_chunks)} chunks indexed")
+                return True
+
+            stale = set(stale_ids)
+            kept_ids = [chunk_id for chunk_id in old_chunks if chunk_id not in stale]
+            target_type = choose_index_type(len(kept_ids) + len(new_ids))
+            target_storage = choose_storage(len(kept_ids) + len(new_ids))
+            index = old_index
+            migrated = False
+
+            # Switch index type as the corpus grows/shrinks; HNSW cannot remove ids
+            if old_index is not None and (
+                describe_index(old_index) != target_type
+                or describe_storage(old_index) != target_storage
+                or (stale and not supports_removal(old_index))
+                or needs_retraining(target_type, target_storage, len(kept_ids) + len(new_ids), self.trained_index_file)
+            ):
+                print(f"🔁 Rebuilding index as {target_type}/{target_storage} for {len(kept_ids) + len(new_ids)} chunks")
+                kept_vectors = self._exact_vectors(old_index, old_chunks, old_vectors, kept_ids)
+                if embeddings is not None:
+                    embeddings = np.vstack([kept_vectors, embeddings])
+                else:
+                    embeddings = kept_vectors
+                new_ids = kept_ids + new_ids
+                migrated = True
+                index = None
+            elif stale:
+                # Readers may be searching old_index, so change a copy
+                index = faiss.clone_index(old_index)
+                index.remove_ids(np.array(stale_ids, dtype=np.int64))
+
+            if embeddings is not None and len(new_ids):
+                # Build FAISS index with stable ids so later rebuilds can remove vectors
+                if index is None:
+                    index = create_index(embeddings, target_type, self.trained_index_file, target_storage, force)
+                elif index is old_index:
+                    index = faiss.clone_index(old_index)
+                index.add_with_ids(embeddings, np.array(new_ids, dtype=np.int64))
+
+            if index is None or index.ntotal == 0:
+                print("⚠️ No text found in uploaded files.")
+                return False
+
+            manifest["files"] = new_files
+            manifest["next_id"] = next_id
+            report("index", 0, 1)
+
+            # Save index
+            index_file = os.path.join(gen_dir, INDEX_FILE)
+            faiss.write_index(index, index_file)
+            fsync_file(index_file)
+
+            # Quantized codes are lossy: keep exact vectors on disk for re-ranking
+            if describe_storage(index) != "float32":
+                if migrated:
+                    all_ids, all_vectors = new_ids, embeddings
+                else:
+                    all_ids = kept_ids + new_ids
+                    parts = [self._exact_vectors(old_index, old_chunks, old_vectors, kept_ids)] if kept_ids else []
+                    if embeddings is not None:
+                        parts.append(embeddings)
+                    all_vectors = np.vstack(parts)
+                write_vectors(all_ids, all_vectors, os.path.join(gen_dir, VECTORS_FILE))
+
+            # Save chunks persistently: kept texts are copied from the old store
+            for chunk_id in kept_ids:
+                metadata = self._kept_metadata(
+                    old_chunks.metadata(chunk_id), placements.get(chunk_id, []), referenced.get(chunk_id, set())
+                )
+                writer.add(chunk_id, old_chunks[chunk_id], metadata)
+                if old_lexical is None:
+                    lexical.add(chunk_id, old_chunks[chunk_id])
+            writer.commit()
+            writer = None
+
+            # Kept chunks reuse their postings instead of being re-tokenized
+            if old_lexical is not None:
+                lexical.extend(old_lexical, kept_ids)
+            lexical = lexical.build()
+            lexical.save(os.path.join(gen_dir, LEXICAL_FILE))
+
+            save_manifest(manifest, os.path.join(gen_dir, MANIFEST_FILE))
+            fsync_dir(gen_dir)
+
+            # Commit point: CURRENT now names the complete new generation
+            atomic_write_json(self.current_file, {"generation": generation})
+            committed_dir, gen_dir = gen_dir, None
+
+            apply_search_params(index)
+            chunks = open_chunk_store(
+                os.path.join(committed_dir, CHUNKS_FILE), os.path.join(committed_dir, OFFSETS_FILE)
+            )
+            vectors = open_vectors(os.path.join(committed_dir, VECTORS_FILE))
+            self._publish(IndexSnapshot(index, chunks, generation, manifest, vectors, lexical))
+            self._remove_old_generations(generation)
+            report("index", 1, 1)
+
+            print(
+                f"✅ Embeddings built successfully: {len(chunks)} chunks indexed "
+                f"in a {describe_index(index)}/{describe_storage(index)} index ({num_encoded} encoded, {len(stale_ids)} removed)"
+            )
+            stats.log()
             return True
-        else:
-            print("⚠️ No existing index found")
+
+        except Exception as e:
+            print(f"❌ Error building embeddings: {e}")
             return False
-    except Exception as e:
-        print(f"❌ Error loading index: {e}")
-        return False
 
+        finally:
+            if encoder is not None:
+                encoder.close()
+            if writer is not None:
+                writer.abort()
+            if gen_dir is not None:
+                shutil.rmtree(gen_dir, ignore_errors=True)
 
-def query_vector_store(query, top_k=3):
-    """Query the vector store to find relevant chunks"""
-    global vector_index, chunks
+    @staticmethod
+    def _kept_metadata(old, placements, sources):
+        """
+        Metadata for a chunk carried over from the previous generation.
+        placements are where this build (or a merged duplicate) placed the
+        chunk and sources the files still referencing it; a chunk shared by
+        several files keeps pointing at its original file while that file
+        still has it.
+        """
+        if old is not None:
+            for placement in placements:
+                if placement.source == old.source:
+                    return placement
+            if old.source in sources:
+                return old
+        return placements[0] if placements else old
 
-    try:
-        # Load index if not in memory
-        if vector_index is None or len(chunks) == 0:
-            if not load_existing_index():
+    @staticmethod
+    def _exact_vectors(index, chunks, vectors, ids):
+        """Float32 vectors for ids, from the exact vector file when there is one"""
+        if vectors is not None and ids:
+            return np.asarray(vectors[chunks.rows(ids)], dtype=np.float32)
+        return reconstruct_vectors(index, ids)
+
+    @staticmethod
+    def _lookup(snapshot):
+        """Function returning exact (or best available) vectors for chunk ids"""
+        if snapshot.vectors is not None:
+            return lambda ids: snapshot.vectors[snapshot.chunks.rows(ids)]
+        return lambda ids: reconstruct_vectors(snapshot.index, ids.tolist())
+
+    def _search(self, snapshot, query_vecs, top_k, allowed=None):
+        """
+        Search the snapshot's index for the top_k nearest chunks.
+        Quantized indexes are over-fetched by RAG_RERANK_FACTOR and the
+        candidates re-ranked with exact float32 distances. allowed restricts
+        the search to those chunk ids with a FAISS ID selector, or by
+        scanning them exactly when the filter is small or the index takes
+        no selector.
+        """
+        params = None
+        top_k = min(top_k, len(snapshot.chunks))
+        if allowed is not None:
+            top_k = min(top_k, len(allowed))
+            small = describe_index(snapshot.index) in ("hnsw", "ivf") and len(allowed) <= FILTER_EXACT_SCAN_MAX
+            if small or not supports_id_selector(snapshot.index):
+                # A graph walk or nprobe lists reach few chunks of a selective filter; scan them instead
+                return rerank_exact(query_vecs, [allowed] * len(query_vecs), self._lookup(snapshot), top_k)
+            params = search_params(snapshot.index, allowed)
+
+        factor = settings.RAG_RERANK_FACTOR
+        if snapshot.vectors is None or factor <= 1:
+            return snapshot.index.search(query_vecs, top_k, params=params)
+
+        num_candidates = min(top_k * factor, len(snapshot.chunks) if allowed is None else len(allowed))
+        _, candidates = snapshot.index.search(query_vecs, num_candidates, params=params)
+        return rerank_exact(query_vecs, candidates, self._lookup(snapshot), top_k)
+
+    def load(self):
+        """Load existing vector index and chunks from disk"""
+        with self._load_lock:
+            try:
+                generation = self._read_current() or 0
+                snapshot = self._snapshot
+                if snapshot is not None and snapshot.version >= generation:
+                    return True
+
+                gen_dir = self._generation_dir(generation)
+                index_file = os.path.join(gen_dir, INDEX_FILE)
+                chunks_file = os.path.join(gen_dir, CHUNKS_FILE)
+                offsets_file = os.path.join(gen_dir, OFFSETS_FILE)
+                legacy_chunks_file = os.path.join(gen_dir, LEGACY_CHUNKS_FILE)
+
+                has_chunks = os.path.exists(chunks_file) and os.path.exists(offsets_file)
+                if os.path.exists(index_file) and (has_chunks or os.path.exists(legacy_chunks_file)):
+                    print("📂 Loading existing index and chunks...")
+                    index = faiss.read_index(index_file)
+                    apply_search_params(index)
+
+                    # Memory-mapped: texts are decoded only when looked up
+                    chunks = open_chunk_store(chunks_file, offsets_file, legacy_chunks_file)
+                    manifest = load_manifest(os.path.join(gen_dir, MANIFEST_FILE))
+                    vectors = open_vectors(os.path.join(gen_dir, VECTORS_FILE))
+                    lexical = open_lexical_index(os.path.join(gen_dir, LEXICAL_FILE))
+                    if lexical is None:
+                        # Generations built before hybrid search: index the texts now
+                        lexical = build_lexical_index(chunks.items())
+                    self._publish(IndexSnapshot(index, chunks, generation, manifest, vectors, lexical))
+
+                    print(f"✅ Loaded {len(chunks)} chunks from disk")
+                    return True
+                else:
+                    print("⚠️ No existing index found")
+                    return False
+            except Exception as e:
+                print(f"❌ Error loading index: {e}")
+                return False
+
+    @staticmethod
+    def _retrieval_mode(snapshot):
+        """RAG_RETRIEVAL_MODE, or "dense" when the snapshot has no lexical index"""
+        lexical = snapshot.lexical
+        if lexical is None or len(lexical) == 0:
+            return "dense"
+        return settings.RAG_RETRIEVAL_MODE.lower()
+
+    @staticmethod
+    def _lexical_only(mode, lexical, query):
+        """Whether query is answered from BM25 alone, without the embedding model"""
+        return mode == "lexical" or (
+            mode == "hybrid" and is_keyword_query(query, lexical, settings.RAG_LEXICAL_MAX_TERMS)
+        )
+
+    def _retrieve(self, snapshot, queries, top_k, allowed=None):
+        """
+        Rank chunks for each query. Returns one list per query of
+        (chunk_id, score, distance) tuples, best first. allowed, if given,
+        is the array of chunk ids the results are restricted to.
+
+        In hybrid mode short keyword queries are answered from BM25 alone,
+        without running the embedding model; the rest fuse the BM25 and
+        dense rankings of RAG_HYBRID_CANDIDATES candidates with RRF. score
+        is the RRF or BM25 score and distance the dense L2 distance, each
+        None when that ranking was not used.
+        """
+        mode = self._retrieval_mode(snapshot)
+        lexical = snapshot.lexical
+
+        results = [None] * len(queries)
+        dense_rows = []
+        for row, query in enumerate(queries):
+            if self._lexical_only(mode, lexical, query):
+                scores, ids = lexical.search(query, top_k, allowed)
+                results[row] = [(int(i), float(score), None) for score, i in zip(scores, ids)]
+            else:
+                dense_rows.append(row)
+
+        if dense_rows:
+            # Create query embeddings (cached for repeated queries)
+            query_vecs = embed_queries([queries[row] for row in dense_rows])
+            num_candidates = top_k if mode == "dense" else max(top_k, settings.RAG_HYBRID_CANDIDATES)
+            D, I = self._search(snapshot, query_vecs, num_candidates, allowed)
+
+            for row, distances, ids in zip(dense_rows, D, I):
+                if mode == "dense":
+                    results[row] = [(int(i), None, float(d)) for d, i in zip(distances, ids) if i >= 0]
+                    continue
+                dense = {int(i): float(d) for d, i in zip(distances, ids) if i >= 0}
+                _, lexical_ids = lexical.search(queries[row], num_candidates, allowed)
+                fused = reciprocal_rank_fusion([ids, lexical_ids], settings.RAG_RRF_K)[:top_k]
+                results[row] = [(i, score, dense.get(i)) for i, score in fused]
+
+        return results
+
+    @staticmethod
+    def _allowed_ids(snapshot, filter):
+        """Chunk ids matching a metadata filter, or None for no filter"""
+        if not filter:
+            return None
+        allowed = snapshot.chunks.select(filter)
+        if not len(allowed):
+            print(f"⚠️ No chunks match filter {filter}")
+        return allowed
+
+    @staticmethod
+    def _metadata(snapshot, chunk_id):
+        metadata = snapshot.chunks.metadata(chunk_id)
+        return metadata._asdict() if metadata is not None else None
+
+    def _rank(self, snapshot, queries, top_k, allowed=None, diversify=False):
+        """
+        _retrieve, optionally diversified: with diversify, RAG_MMR_FETCH_K
+        candidates are retrieved and top_k of them picked by Maximal
+        Marginal Relevance over their stored vectors. Queries answered from
+        BM25 alone keep their BM25 ranking, so diversifying them never runs
+        the embedding model.
+        """
+        if not diversify:
+            return self._retrieve(snapshot, queries, top_k, allowed)
+
+        candidates = self._retrieve(snapshot, queries, max(top_k, settings.RAG_MMR_FETCH_K), allowed)
+        results = [hits[:top_k] for hits in candidates]
+        mode = self._retrieval_mode(snapshot)
+        dense_rows = [
+            row for row, query in enumerate(queries)
+            if len(candidates[row]) > 1 and not self._lexical_only(mode, snapshot.lexical, query)
+        ]
+        if not dense_rows:
+            return results
+
+        query_vecs = embed_queries([queries[row] for row in dense_rows])
+        lookup = self._lookup(snapshot)
+        for row, query_vec in zip(dense_rows, query_vecs):
+            hits = candidates[row]
+            vectors = lookup(np.array([hit[0] for hit in hits], dtype=np.int64))
+            order = maximal_marginal_relevance(query_vec, vectors, top_k, settings.RAG_MMR_LAMBDA)
+            results[row] = [hits[i] for i in order]
+        return results
+
+    def query(self, query, top_k=3, filter=None, with_metadata=False, diversify=False):
+        """
+        Query the vector store to find relevant chunks.
+        filter restricts the search by chunk metadata, e.g.
+        {"source": "resume.pdf", "page": 2, "heading": "Experience"}.
+        diversify re-ranks over-fetched candidates with MMR so near-identical
+        chunks do not crowd out the rest.
+        Returns chunk texts, or {"chunk", "metadata"} dicts with_metadata.
+        """
+        try:
+            # Load index if not in memory; a concurrent rebuild swaps in a new snapshot
+            snapshot = self.snapshot()
+            if snapshot is None or len(snapshot.chunks) == 0:
                 print("⚠️ No index available. Please upload documents first.")
                 return []
 
-        # Create query embedding
-        query_vec = embedding_model.encode([query])
-        query_vec = np.array(query_vec, dtype=np.float32)
+            allowed = self._allowed_ids(snapshot, filter)
+            if allowed is not None and not len(allowed):
+                return []
 
-        # Search for similar chunks
-        D, I = vector_index.search(query_vec, min(top_k, len(chunks)))
+            # Search for similar chunks
+            hits = self._rank(snapshot, [query], top_k, allowed, diversify)[0]
 
-        results = []
-        for idx in I[0]:
-            if 0 <= idx < len(chunks):
-                results.append(chunks[idx])
-        
-        print(f"🔍 Found {len(results)} relevant chunks for query")
-        return results
-        
-    except Exception as e:
-        print(f"❌ Error querying vector store: {e}")
-        return []
+            results = []
+            for idx, _, _ in hits:
+                text = snapshot.chunks.get(idx)
+                if text is None:
+                    continue
+                if with_metadata:
+                    results.append({"chunk": text, "metadata": self._metadata(snapshot, idx)})
+                else:
+                    results.append(text)
+
+            print(f"🔍 Found {len(results)} relevant chunks for query")
+            return results
+
+        except Exception as e:
+            print(f"❌ Error querying vector store: {e}")
+            return []
+
+    def query_batch(self, queries, top_k=3, filter=None, diversify=False):
+        """
+        Query the vector store for several queries at once.
+        Encodes all queries that need the dense index in one call and runs
+        one FAISS search over the stacked matrix. Returns one list per query
+        of {"chunk", "score", "distance", "metadata"} dicts, best first;
+        score or distance is None when its ranking was not used. filter
+        and diversify work as in query().
+        """
+        if not queries:
+            return []
+
+        try:
+            # Load index if not in memory
+            snapshot = self.snapshot()
+            if snapshot is None or len(snapshot.chunks) == 0:
+                print("⚠️ No index available. Please upload documents first.")
+                return [[] for _ in queries]
+
+            allowed = self._allowed_ids(snapshot, filter)
+            if allowed is not None and not len(allowed):
+                return [[] for _ in queries]
+
+            results = []
+            for hits in self._rank(snapshot, queries, top_k, allowed, diversify):
+                found = []
+                for idx, score, distance in hits:
+                    text = snapshot.chunks.get(idx)
+                    if text is not None:
+                        found.append({
+                            "chunk": text,
+                            "score": score,
+                            "distance": distance,
+                            "metadata": self._metadata(snapshot, idx),
+                        })
+                results.append(found)
+
+            print(f"🔍 Searched {len(queries)} queries in one batch")
+            return results
+
+        except Exception as e:
+            print(f"❌ Error querying vector store: {e}")
+            return [[] for _ in queries]
+
+    @staticmethod
+    def _embedding_cache_stats():
+        if not is_embedding_model_loaded():
+            return None
+        cache = get_embedding_cache(get_embedding_model_id(), get_embedding_model().dimension)
+        return cache.stats() if cache else None
+
+    def info(self):
+        """Get information about the current index"""
+        snapshot = self.snapshot()
+        index = snapshot.index if snapshot else None
+        chunks = snapshot.chunks if snapshot else {}
+
+        return {
+            "root": self.root,
+            "version": snapshot.version if snapshot else None,
+            "num_chunks": len(chunks),
+            "index_exists": index is not None,
+            "memory_bytes": self.memory_bytes(),
+            **get_index_params(index),
+            "sample_chunk": next(iter(chunks.values()))[:100] + "..." if chunks else "No chunks available",
+            "embedding_model": get_embedding_model_id(),
+            "embedding_backend": settings.RAG_EMBEDDING_BACKEND,
+            "embedding_model_loaded": is_embedding_model_loaded(),
+            "embedding_model_load_seconds": get_model_load_time(),
+            "query_cache": get_query_cache_stats(),
+            "embedding_cache": self._embedding_cache_stats(),
+            "retrieval_mode": settings.RAG_RETRIEVAL_MODE,
+            "lexical_terms": len(snapshot.lexical.terms) if snapshot and snapshot.lexical is not None else 0,
+        }
+
+
+default_store = VectorStore()
+
+
+def build_embeddings(force=False, progress=None):
+    """Build vector embeddings from all files in knowledge base"""
+    return default_store.build(force, progress)
+
+
+def load_existing_index():
+    """Load existing vector index and chunks from disk"""
+    return default_store.load()
+
+
+def query_vector_store(query, top_k=3, filter=None, with_metadata=False, diversify=False):
+    """Query the vector store to find relevant chunks"""
+    return default_store.query(query, top_k, filter, with_metadata, diversify)
+
+
+def query_vector_store_batch(queries, top_k=3, filter=None, diversify=False):
+    """Query the vector store for several queries in one batch"""
+    return default_store.query_batch(queries, top_k, filter, diversify)
 
 
 def get_index_info():
     """Get information about the current index"""
-    global vector_index, chunks
-    
-    if vector_index is None or len(chunks) == 0:
-        load_existing_index()
-    
-    return {
-        "num_chunks": len(chunks),
-        "index_exists": vector_index is not None,
-        "sample_chunk": chunks[0][:100] + "..." if chunks else "No chunks available"
-    }
\ No newline at end of file
+    return default_store.info()
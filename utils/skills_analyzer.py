@@ -1,330 +1,284 @@
+import os
 import re
+import json
+import pickle
+import hashlib
+import threading
+from collections import Counter
 from typing import Dict, List
+from config.config import settings
 
-# ===========================================
-# TECHNOLOGY & SOFTWARE DEVELOPMENT
-# ===========================================
-
-TECH_SKILLS = {
-    'programming': [
-        'python', 'javascript', 'java', 'c++', 'c#', 'ruby', 'php', 'swift', 'kotlin',
-        'go', 'rust', 'typescript', 'scala', 'r', 'matlab', 'sql', 'html', 'css',
-    ],
-    'frameworks': [
-        'react', 'angular', 'vue', 'node.js', 'django', 'flask', 'spring',
-        'tensorflow', 'pytorch', 'keras', 'fastapi', 'next.js',
-    ],
-    'cloud_devops': [
-        'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'terraform',
-        'ci/cd', 'linux', 'bash', 'ansible',
-    ],
-    'databases': [
-        'postgresql', 'mysql', 'mongodb', 'redis', 'oracle', 'sql server',
-    ],
-    'ai_ml': [
-        'machine learning', 'deep learning', 'nlp', 'computer vision',
-        'data science', 'generative ai', 'llm', 'chatgpt',
-    ]
-}
-
-# ===========================================
-# BUSINESS & FINANCE
-# ===========================================
-
-BUSINESS_FINANCE_SKILLS = {
-    'financial_analysis': [
-        'financial modeling', 'excel', 'financial analysis', 'forecasting',
-        'budgeting', 'variance analysis', 'financial reporting', 'gaap',
-        'ifrs', 'sox compliance', 'financial statements',
-    ],
-    'accounting': [
-        'bookkeeping', 'accounts payable', 'accounts receivable', 'reconciliation',
-        'quickbooks', 'sage', 'xero', 'sap', 'oracle financials',
-        'general ledger', 'journal entries', 'trial balance',
-    ],
-    'investment_banking': [
-        'investment banking', 'mergers and acquisitions', 'm&a', 'ipos',
-        'valuation', 'dcf', 'lbo', 'comps', 'pitch books',
-        'bloomberg terminal', 'capital iq', 'factset',
-    ],
-    'business_analysis': [
-        'business analysis', 'requirements gathering', 'process mapping',
-        'stakeholder management', 'user stories', 'business intelligence',
-        'kpi tracking', 'dashboard creation', 'data visualization',
-    ],
-    'consulting': [
-        'strategy consulting', 'management consulting', 'business strategy',
-        'market research', 'competitive analysis', 'swot analysis',
-        'bcg matrix', 'porter five forces', 'case interviews',
-    ]
-}
-
-# ===========================================
-# MARKETING & SALES
-# ===========================================
-
-MARKETING_SALES_SKILLS = {
-    'digital_marketing': [
-        'seo', 'sem', 'google analytics', 'google ads', 'facebook ads',
-        'content marketing', 'email marketing', 'social media marketing',
-        'influencer marketing', 'affiliate marketing', 'ppc',
-        'conversion rate optimization', 'a/b testing', 'growth hacking',
-    ],
-    'marketing_tools': [
-        'hubspot', 'salesforce', 'mailchimp', 'hootsuite', 'buffer',
-        'canva', 'adobe creative suite', 'wordpress', 'shopify',
-        'google tag manager', 'hotjar', 'mixpanel',
-    ],
-    'sales': [
-        'sales', 'b2b sales', 'b2c sales', 'account management',
-        'lead generation', 'cold calling', 'negotiation', 'closing',
-        'crm', 'salesforce crm', 'pipeline management', 'quota attainment',
-        'prospecting', 'sales forecasting', 'sales presentations',
-    ],
-    'brand_marketing': [
-        'brand strategy', 'brand positioning', 'brand awareness',
-        'public relations', 'media relations', 'press releases',
-        'event marketing', 'experiential marketing',
-    ]
-}
-
-# ===========================================
-# DESIGN & CREATIVE
-# ===========================================
-
-DESIGN_CREATIVE_SKILLS = {
-    'graphic_design': [
-        'graphic design', 'adobe photoshop', 'adobe illustrator',
-        'adobe indesign', 'figma', 'sketch', 'typography',
-        'color theory', 'layout design', 'print design',
-    ],
-    'ui_ux': [
-        'ui design', 'ux design', 'user research', 'wireframing',
-        'prototyping', 'usability testing', 'information architecture',
-        'interaction design', 'design thinking', 'user personas',
-        'user flows', 'journey mapping',
-    ],
-    'video_animation': [
-        'video editing', 'adobe premiere', 'final cut pro', 'after effects',
-        'motion graphics', '3d animation', 'blender', 'cinema 4d',
-        'video production', 'cinematography', 'storyboarding',
-    ],
-    'content_creation': [
-        'copywriting', 'content writing', 'technical writing',
-        'creative writing', 'editing', 'proofreading', 'blogging',
-        'storytelling', 'seo writing', 'ghostwriting',
-    ]
-}
-
-# ===========================================
-# HEALTHCARE & MEDICAL
-# ===========================================
-
-HEALTHCARE_SKILLS = {
-    'clinical': [
-        'patient care', 'clinical assessment', 'diagnosis', 'treatment planning',
-        'medical terminology', 'vital signs', 'medication administration',
-        'wound care', 'iv therapy', 'phlebotomy', 'cpr', 'bls', 'acls',
-    ],
-    'medical_specialties': [
-        'cardiology', 'oncology', 'pediatrics', 'geriatrics', 'surgery',
-        'emergency medicine', 'radiology', 'anesthesiology', 'psychiatry',
-        'obstetrics', 'gynecology', 'orthopedics', 'neurology',
-    ],
-    'healthcare_admin': [
-        'epic', 'cerner', 'meditech', 'electronic health records', 'ehr',
-        'hipaa compliance', 'medical coding', 'icd-10', 'cpt codes',
-        'medical billing', 'insurance verification', 'claims processing',
-    ],
-    'pharmacy': [
-        'pharmacology', 'drug interactions', 'dispensing', 'compounding',
-        'medication therapy management', 'immunizations', 'counseling',
-    ]
-}
-
-# ===========================================
-# ENGINEERING (NON-SOFTWARE)
-# ===========================================
-
-ENGINEERING_SKILLS = {
-    'mechanical': [
-        'cad', 'autocad', 'solidworks', 'catia', 'creo', 'ansys',
-        'fea', 'cfd', 'thermodynamics', 'fluid mechanics', 'mechanics',
-        'machine design', 'manufacturing', 'gd&t', 'tolerance analysis',
-    ],
-    'electrical': [
-        'circuit design', 'pcb design', 'eagle', 'altium', 'labview',
-        'power systems', 'control systems', 'plc', 'scada',
-        'embedded systems', 'microcontrollers', 'arduino', 'raspberry pi',
-    ],
-    'civil': [
-        'structural analysis', 'autocad civil 3d', 'revit', 'etabs', 'staad pro',
-        'construction management', 'surveying', 'geotechnical', 'hydraulics',
-        'project planning', 'quantity estimation', 'bim',
-    ],
-    'chemical': [
-        'process engineering', 'aspen plus', 'hysys', 'chemcad',
-        'distillation', 'reaction engineering', 'process safety',
-        'mass transfer', 'heat transfer', 'process optimization',
-    ]
-}
-
-# ===========================================
-# HUMAN RESOURCES
-# ===========================================
-
-HR_SKILLS = {
-    'recruitment': [
-        'recruiting', 'talent acquisition', 'sourcing', 'screening',
-        'interviewing', 'ats', 'applicant tracking system', 'linkedin recruiter',
-        'boolean search', 'candidate assessment', 'onboarding',
-    ],
-    'hr_operations': [
-        'hris', 'workday', 'adp', 'bamboohr', 'payroll', 'benefits administration',
-        'compensation', 'employee relations', 'performance management',
-        'hris reporting', 'compliance', 'labor law',
-    ],
-    'training_development': [
-        'training', 'learning and development', 'instructional design',
-        'e-learning', 'lms', 'talent development', 'leadership development',
-        'coaching', 'mentoring', 'organizational development',
-    ]
-}
-
-# ===========================================
-# OPERATIONS & SUPPLY CHAIN
-# ===========================================
-
-OPERATIONS_SKILLS = {
-    'supply_chain': [
-        'supply chain management', 'logistics', 'inventory management',
-        'procurement', 'vendor management', 'purchasing', 'sourcing',
-        'warehouse management', 'demand planning', 'forecasting',
-        'sap', 'oracle scm', 'erp systems',
-    ],
-    'operations': [
-        'operations management', 'process improvement', 'lean', 'six sigma',
-        'kaizen', '5s', 'value stream mapping', 'root cause analysis',
-        'project management', 'pmp', 'agile', 'scrum',
-    ],
-    'quality': [
-        'quality assurance', 'quality control', 'iso 9001', 'iso 14001',
-        'gmp', 'fda regulations', 'validation', 'documentation',
-        'audit', 'statistical process control', 'spc',
-    ]
-}
-
-# ===========================================
-# LEGAL & COMPLIANCE
-# ===========================================
-
-LEGAL_SKILLS = {
-    'legal': [
-        'contract law', 'legal research', 'legal writing', 'litigation',
-        'contract negotiation', 'due diligence', 'compliance',
-        'regulatory compliance', 'corporate law', 'intellectual property',
-        'patents', 'trademarks', 'employment law', 'real estate law',
-    ],
-    'legal_tech': [
-        'westlaw', 'lexisnexis', 'clio', 'legal software', 'e-discovery',
-        'document review', 'contract management software',
-    ]
-}
-
-# ===========================================
-# EDUCATION & TEACHING
-# ===========================================
-
-EDUCATION_SKILLS = {
-    'teaching': [
-        'curriculum development', 'lesson planning', 'classroom management',
-        'differentiated instruction', 'assessment', 'student engagement',
-        'educational technology', 'learning management system', 'lms',
-        'google classroom', 'canvas', 'blackboard', 'moodle',
-    ],
-    'specializations': [
-        'special education', 'esl', 'stem education', 'early childhood education',
-        'higher education', 'online teaching', 'instructional design',
-    ]
-}
-
-# ===========================================
-# CUSTOMER SERVICE & SUPPORT
-# ===========================================
-
-CUSTOMER_SERVICE_SKILLS = {
-    'customer_support': [
-        'customer service', 'customer support', 'technical support',
-        'troubleshooting', 'help desk', 'zendesk', 'freshdesk',
-        'salesforce service cloud', 'ticketing systems', 'call center',
-        'phone support', 'email support', 'chat support', 'live chat',
-    ],
-    'client_relations': [
-        'account management', 'client relations', 'relationship management',
-        'customer success', 'retention', 'upselling', 'cross-selling',
-        'customer satisfaction', 'nps', 'customer feedback',
-    ]
-}
-
-# ===========================================
-# SOFT SKILLS (UNIVERSAL)
-# ===========================================
-
-SOFT_SKILLS = [
-    'leadership', 'communication', 'teamwork', 'problem solving',
-    'critical thinking', 'project management', 'time management',
-    'adaptability', 'creativity', 'collaboration', 'mentoring',
-    'presentation', 'analytical', 'strategic thinking', 'negotiation',
-    'conflict resolution', 'decision making', 'emotional intelligence',
-    'attention to detail', 'multitasking', 'organizational',
-]
-
-# ===========================================
-# LANGUAGE SKILLS
-# ===========================================
-
-LANGUAGES = [
-    'english', 'spanish', 'mandarin', 'french', 'german', 'japanese',
-    'portuguese', 'arabic', 'hindi', 'russian', 'korean', 'italian',
-    'bilingual', 'multilingual', 'native speaker', 'fluent', 'conversational',
-]
-
-# ===========================================
-# CERTIFICATIONS BY INDUSTRY
-# ===========================================
-
-CERTIFICATIONS = {
-    'tech': ['aws certified', 'azure certified', 'google cloud certified', 'cissp', 'pmp', 'scrum master', 'comptia'],
-    'finance': ['cfa', 'cpa', 'frm', 'cma', 'cia', 'cfp'],
-    'healthcare': ['rn', 'md', 'do', 'pa', 'np', 'cna', 'lpn', 'pharmacist'],
-    'hr': ['phr', 'sphr', 'shrm-cp', 'shrm-scp'],
-    'operations': ['six sigma', 'lean', 'pmp', 'cscp', 'cpim'],
-}
+# Bump when SkillMatcher's pickled layout changes, so old cache files are ignored
+MATCHER_FORMAT = 1
+MATCHER_CACHE_KEEP = 4
+
+# Bare aliases like "js" or "ml" match unrelated text ("node.js", "5 ml");
+# shorter ones must contain a digit or symbol, like "k8s"
+MIN_ALIAS_LENGTH = 4
+
+WORD_RUN = re.compile(r"\w+")
+WORD_CHAR = re.compile(r"\w")
+
+
+class SkillMatcher:
+    """
+    Finds every taxonomy term in a text in one pass over its words.
+
+    A term can only occur where a word of the text (a maximal \\w+ run)
+    equals the term's own first word, so single-word terms are found by
+    intersecting the text's words with a set, and the rest ("sql server",
+    "c++", "ci/cd") are only searched for when their first word is there. The
+    result is the same set of terms as searching for
+    r'\\b' + re.escape(term) + r'\\b' one term at a time. Matchers are
+    plain sets and dicts, so they pickle and load quickly.
+    """
+
+    def __init__(self, terms):
+        self.single = set()
+        self.multi = {}
+        for term in sorted(set(terms)):
+            head = WORD_RUN.match(term)
+            if head is None:
+                raise ValueError(f"Skill term {term!r} must start with a letter or digit")
+            if head.end() == len(term):
+                self.single.add(term)
+            else:
+                # Whether the term's last character is a word character, for the \b after it
+                self.multi.setdefault(head.group(), []).append((term, bool(WORD_CHAR.match(term[-1]))))
+
+    def __len__(self):
+        return len(self.single) + sum(len(terms) for terms in self.multi.values())
+
+    @staticmethod
+    def _occurrences(text, term, ends_in_word):
+        """Start offsets of a multi-word term in text where \\b holds at both ends"""
+        start = text.find(term)
+        while start != -1:
+            end = start + len(term)
+            if (start == 0 or not WORD_CHAR.match(text[start - 1])) and (
+                ends_in_word if end == len(text) else ends_in_word != bool(WORD_CHAR.match(text[end]))
+            ):
+                yield start
+            start = text.find(term, start + 1)
+
+    def find(self, text: str) -> set:
+        """The set of terms occurring in text (which should be lowercased)"""
+        words = set(WORD_RUN.findall(text))
+        found = words & self.single
+
+        for head in words.intersection(self.multi):
+            for term, ends_in_word in self.multi[head]:
+                if next(self._occurrences(text, term, ends_in_word), None) is not None:
+                    found.add(term)
+        return found
+
+    def count(self, text: str) -> Counter:
+        """How often each term occurs in text (which should be lowercased)"""
+        words = WORD_RUN.findall(text)
+        counts = Counter(word for word in words if word in self.single)
+
+        for head in self.multi.keys() & set(words):
+            for term, ends_in_word in self.multi[head]:
+                occurrences = sum(1 for _ in self._occurrences(text, term, ends_in_word))
+                if occurrences:
+                    counts[term] = occurrences
+        return counts
+
+
+class SkillTaxonomy:
+    """
+    The skill taxonomy loaded from its versioned data file.
+
+    categories maps a category to its subcategories' skill lists;
+    certifications maps an industry to its certifications;
+    industry_keywords tell detect_industry which industries a resume is in,
+    matched on word boundaries like skills;
+    ats_roles are what ATS scoring screens a role for: the keywords that
+    identify it, the categories ("Technology") or subcategories
+    ("Technology/databases") whose skills it looks for, and skill lists of
+    its own, which extract_skills does not report. aliases map alternative
+    spellings ("k8s") to the term they stand for ("kubernetes"). digest is
+    the sha256 of the file's bytes.
+    """
+
+    def __init__(self, data, digest, matcher=None):
+        self.version = data["version"]
+        self.categories = data["categories"]
+        self.soft_skills = data["soft_skills"]
+        self.languages = data["languages"]
+        self.certifications = data["certifications"]
+        self.industry_keywords = data["industry_keywords"]
+        self.ats_roles = data.get("ats_roles", {})
+        self.aliases = data.get("aliases", {})
+        self.digest = digest
+
+        terms = set(self.terms())
+        for alias, term in self.aliases.items():
+            if term not in terms:
+                raise ValueError(f"Alias {alias!r} points to unknown skill {term!r}")
+            if alias in terms:
+                raise ValueError(f"Alias {alias!r} is also a skill")
+            if len(alias) < MIN_ALIAS_LENGTH and alias.isalpha():
+                raise ValueError(f"Alias {alias!r} is too short to tell apart from other words")
+        for role, spec in self.ats_roles.items():
+            for entry in spec.get("categories", []):
+                category, _, subcategory = entry.partition("/")
+                if category not in self.categories or (subcategory and subcategory not in self.categories[category]):
+                    raise ValueError(f"ATS role {role!r} points to unknown category {entry!r}")
+        self.matcher = matcher or SkillMatcher(terms | set(self.aliases))
+        self.industry_matcher = SkillMatcher(
+            keyword for keywords in self.industry_keywords.values() for keyword in keywords
+        )
+        self.role_matcher = SkillMatcher(
+            keyword for spec in self.ats_roles.values() for keyword in spec["keywords"]
+        )
+
+    def terms(self):
+        """Every skill, soft skill, language, certification and ATS role skill"""
+        for subcategories in self.categories.values():
+            for skills in subcategories.values():
+                yield from skills
+        yield from self.soft_skills
+        yield from self.languages
+        for certs in self.certifications.values():
+            yield from certs
+        for spec in self.ats_roles.values():
+            for skills in spec.get("skills", {}).values():
+                yield from skills
+
+    def find(self, text_lower: str) -> set:
+        """Terms in lowercased text, with aliases replaced by the terms they stand for"""
+        found = self.matcher.find(text_lower)
+        return {self.aliases.get(term, term) for term in found}
+
+    def count(self, text_lower: str) -> Counter:
+        """Occurrences of each term in lowercased text, aliases counted as their terms"""
+        counts = Counter()
+        for term, occurrences in self.matcher.count(text_lower).items():
+            counts[self.aliases.get(term, term)] += occurrences
+        return counts
+
+    def role_subcategories(self, roles) -> List[tuple]:
+        """
+        (category, subcategory, skills) looked for by the given ATS roles,
+        without repeats. A role's own skill lists come first, under the
+        role's name as their category.
+        """
+        found = {}
+        for role in roles:
+            spec = self.ats_roles.get(role, {})
+            for name, skills in spec.get("skills", {}).items():
+                found.setdefault((role, name), skills)
+            for entry in spec.get("categories", []):
+                category, _, only = entry.partition("/")
+                for subcategory, skills in self.categories[category].items():
+                    if not only or subcategory == only:
+                        found.setdefault((category, subcategory), skills)
+        return [(category, subcategory, skills) for (category, subcategory), skills in found.items()]
+
+
+def _matcher_cache_path(digest):
+    return os.path.join(settings.SKILL_MATCHER_CACHE_DIR, f"{digest}-v{MATCHER_FORMAT}.pkl")
+
+
+def _load_cached_matcher(digest):
+    try:
+        with open(_matcher_cache_path(digest), "rb") as f:
+            matcher = pickle.load(f)
+        return matcher if isinstance(matcher, SkillMatcher) else None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def _save_cached_matcher(digest, matcher):
+    """Write the matcher via a temp file, keeping only the newest few cached"""
+    try:
+        os.makedirs(settings.SKILL_MATCHER_CACHE_DIR, exist_ok=True)
+        path = _matcher_cache_path(digest)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(matcher, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+        cached = sorted(
+            (entry for entry in os.scandir(settings.SKILL_MATCHER_CACHE_DIR) if entry.name.endswith(".pkl")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in cached[MATCHER_CACHE_KEEP:]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"⚠️ Could not cache skill matcher: {e}")
+
+
+def load_taxonomy(path=None) -> SkillTaxonomy:
+    """
+    Load a taxonomy file. The compiled matcher is read from the on-disk
+    cache when one was built from identical file contents.
+    """
+    with open(path or settings.SKILL_TAXONOMY_FILE, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    data = json.loads(raw)
+
+    matcher = _load_cached_matcher(digest)
+    taxonomy = SkillTaxonomy(data, digest, matcher)
+    if matcher is None:
+        _save_cached_matcher(digest, taxonomy.matcher)
+    return taxonomy
+
+
+_taxonomy = None
+_taxonomy_stamp = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_taxonomy() -> SkillTaxonomy:
+    """
+    The process-wide taxonomy, reloaded when its file changes on disk.
+    A file that fails to load keeps the previous taxonomy in use.
+    """
+    global _taxonomy, _taxonomy_stamp
+    try:
+        stat = os.stat(settings.SKILL_TAXONOMY_FILE)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = None
+    if _taxonomy is not None and stamp == _taxonomy_stamp:
+        return _taxonomy
+
+    with _taxonomy_lock:
+        if _taxonomy is None or stamp != _taxonomy_stamp:
+            try:
+                taxonomy = load_taxonomy()
+            except (OSError, ValueError, KeyError) as e:
+                if _taxonomy is None:
+                    raise
+                print(f"⚠️ Keeping skill taxonomy v{_taxonomy.version}, reload failed: {e}")
+            else:
+                if _taxonomy is not None and taxonomy.digest != _taxonomy.digest:
+                    print(f"🔄 Reloaded skill taxonomy v{taxonomy.version} ({len(taxonomy.matcher)} terms)")
+                _taxonomy = taxonomy
+            _taxonomy_stamp = stamp
+    return _taxonomy
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """The compiled matcher of the current taxonomy"""
+    return get_taxonomy().matcher
 
 
 def detect_industry(resume_text: str) -> List[str]:
     """
-    Detect which industries the resume is related to.
+    Detect which industries the resume is related to. Keywords match
+    whole words, so "hr" does not match inside "through".
     """
-    resume_lower = resume_text.lower()
+    taxonomy = get_taxonomy()
+    found = taxonomy.industry_matcher.find(resume_text.lower())
     industries = []
     
     # Check for industry indicators
-    industry_keywords = {
-        'technology': ['software', 'developer', 'engineer', 'programming', 'coding', 'tech'],
-        'finance': ['financial', 'accounting', 'banking', 'investment', 'analyst', 'cpa', 'cfa'],
-        'healthcare': ['medical', 'healthcare', 'clinical', 'patient', 'hospital', 'nurse', 'doctor'],
-        'marketing': ['marketing', 'seo', 'social media', 'campaigns', 'brand'],
-        'sales': ['sales', 'account executive', 'business development', 'revenue'],
-        'design': ['design', 'creative', 'ui', 'ux', 'graphic', 'photoshop'],
-        'hr': ['human resources', 'hr', 'recruiting', 'talent acquisition', 'hiring'],
-        'operations': ['operations', 'supply chain', 'logistics', 'manufacturing'],
-        'education': ['teaching', 'education', 'teacher', 'professor', 'instructor'],
-        'legal': ['legal', 'attorney', 'lawyer', 'paralegal', 'law'],
-    }
-    
-    for industry, keywords in industry_keywords.items():
-        if any(keyword in resume_lower for keyword in keywords):
+    for industry, keywords in taxonomy.industry_keywords.items():
+        if any(keyword in found for keyword in keywords):
             industries.append(industry)
     
     return industries if industries else ['general']
@@ -335,36 +289,24 @@ def extract_skills(resume_text: str) -> Dict[str, any]:
     Extract skills across all industries with intelligent categorization.
     """
     resume_lower = resume_text.lower()
+    taxonomy = get_taxonomy()
     
     # Detect industries first
     detected_industries = detect_industry(resume_text)
     
-    # Combine all skill dictionaries
-    all_skill_categories = {
-        'Technology': TECH_SKILLS,
-        'Business & Finance': BUSINESS_FINANCE_SKILLS,
-        'Marketing & Sales': MARKETING_SALES_SKILLS,
-        'Design & Creative': DESIGN_CREATIVE_SKILLS,
-        'Healthcare': HEALTHCARE_SKILLS,
-        'Engineering': ENGINEERING_SKILLS,
-        'Human Resources': HR_SKILLS,
-        'Operations': OPERATIONS_SKILLS,
-        'Legal': LEGAL_SKILLS,
-        'Education': EDUCATION_SKILLS,
-        'Customer Service': CUSTOMER_SERVICE_SKILLS,
-    }
+    # Every taxonomy term in the resume, found in one pass
+    matched = taxonomy.find(resume_lower)
     
     found_skills = {}
     total_technical_skills = []
     
     # Extract skills from each category
-    for category_name, subcategories in all_skill_categories.items():
+    for category_name, subcategories in taxonomy.categories.items():
         category_skills = []
         
         for subcategory, skills in subcategories.items():
             for skill in skills:
-                pattern = r'\b' + re.escape(skill) + r'\b'
-                if re.search(pattern, resume_lower):
+                if skill in matched:
                     category_skills.append(skill.title())
                     total_technical_skills.append(skill.title())
         
@@ -372,26 +314,13 @@ def extract_skills(resume_text: str) -> Dict[str, any]:
             found_skills[category_name] = sorted(list(set(category_skills)))
     
     # Extract soft skills
-    found_soft = []
-    for skill in SOFT_SKILLS:
-        pattern = r'\b' + re.escape(skill) + r'\b'
-        if re.search(pattern, resume_lower):
-            found_soft.append(skill.title())
+    found_soft = [skill.title() for skill in taxonomy.soft_skills if skill in matched]
     
     # Extract languages
-    found_languages = []
-    for lang in LANGUAGES:
-        pattern = r'\b' + re.escape(lang) + r'\b'
-        if re.search(pattern, resume_lower):
-            found_languages.append(lang.title())
+    found_languages = [lang.title() for lang in taxonomy.languages if lang in matched]
     
     # Extract certifications
-    found_certs = []
-    for cert_category, certs in CERTIFICATIONS.items():
-        for cert in certs:
-            pattern = r'\b' + re.escape(cert) + r'\b'
-            if re.search(pattern, resume_lower):
-                found_certs.append(cert.upper())
+    found_certs = [cert.upper() for certs in taxonomy.certifications.values() for cert in certs if cert in matched]
     
     # Extract years of experience
     experience_pattern = r'(\d+)\+?\s*years?'
@@ -460,23 +389,3 @@ def generate_industry_specific_recommendations(skills_data: Dict) -> str:
         """)
     
     return "\n".join(recommendations)
-
-def generate_ats_suggestions(resume_text: str):
-    """
-    Generates ATS optimization suggestions based on resume content.
-    This is a lightweight fallback function so the app does not crash.
-    """
-    if not resume_text:
-        return "No resume content available for ATS analysis."
-
-    suggestions = [
-        "Use consistent formatting, avoid tables and text boxes.",
-        "Add measurable achievements (numbers & metrics).",
-        "Include job-title keywords from your target roles.",
-        "Use standard section headings (Experience, Skills, Projects).",
-        "Ensure all acronyms are expanded once (e.g., Machine Learning (ML)).",
-        "Avoid images or decorative icons.",
-        "Use simple fonts like Arial, Calibri, or Helvetica.",
-    ]
-
-    return "### ATS Optimization Suggestions\n" + "\n".join([f"- {s}" for s in suggestions])